@@ -1,82 +1,269 @@
-import serial
+import os
+import re
+import sys
+import json
 import time
+import argparse
+import numpy as np
+import serial
 
-PORT = '/dev/cu.usbserial-A5069RR4'
-BAUDRATE = 153600
+from lidar_core import (
+    BAUD_RATE,
+    INVALID_DISTANCE,
+    PACKET_HEADER_LEN,
+    MAX_PACKET_LEN,
+    FULL_TURN_CDEG,
+    PacketDecoder,
+    angles_ok,
+    is_wrap,
+    valid_mask,
+    find_lidar_port,
+)
 
-def main():
-    print(f"Opening {PORT} at {BAUDRATE} baud...")
-    ser = serial.Serial(PORT, BAUDRATE, timeout=1)
-    time.sleep(0.5)
-    
-    print("Reading data for 5 seconds...")
-    print("="*70)
-    
-    start = time.time()
-    data = b''
-    while time.time() - start < 5:
-        chunk = ser.read(512)
-        if chunk:
-            data += chunk
-    
-    ser.close()
-    
-    print(f"Received {len(data)} bytes\n")
-    
-    print("Parsing packets (AA 55 header):")
-    print("="*70)
-    
-    i = 0
-    packet_num = 0
-    while i < len(data) - 10:
-        # Look for header
-        if data[i] == 0xAA and data[i+1] == 0x55:
-            packet_num += 1
-            
-            lidar_type = data[i+2]
-            num_measurements = data[i+3]
-            
-            # Start angle (little endian)
-            start_angle = data[i+4] | (data[i+5] << 8)
-            # End angle (little endian)  
-            end_angle = data[i+6] | (data[i+7] << 8)
-            # Unknown bytes
-            unknown1 = data[i+8]
-            unknown2 = data[i+9]
-            
-            print(f"\nPacket #{packet_num} at offset {i}")
-            print(f"  Header:        AA 55")
-            print(f"  Lidar Type:    0x{lidar_type:02X} ({lidar_type})")
-            print(f"  Measurements:  {num_measurements}")
-            print(f"  Start Angle:   {start_angle} (raw) = {start_angle/100:.2f}°")
-            print(f"  End Angle:     {end_angle} (raw) = {end_angle/100:.2f}°")
-            print(f"  Unknown:       0x{unknown1:02X} 0x{unknown2:02X}")
-            
-            # Print first few measurements
-            print(f"  Data bytes (first 15 measurements):")
-            data_start = i + 10
-            for m in range(min(15, num_measurements)):
-                offset = data_start + m * 3
-                if offset + 2 < len(data):
-                    quality = data[offset]
-                    dist_low = data[offset + 1]
-                    dist_high = data[offset + 2]
-                    distance = dist_low | (dist_high << 8)
-                    print(f"    [{m:2d}] Quality: {quality:3d}  Distance: {distance:5d} mm  "
-                          f"(raw: {quality:02X} {dist_low:02X} {dist_high:02X})")
-            
-            # Move to next potential packet
-            packet_size = 10 + num_measurements * 3
-            i += packet_size
-            
-            if packet_num >= 10:
-                print(f"\n... showing first 10 packets")
-                break
+CHUNK_SIZE = 65536
+GAP_BIN_CDEG = 25
+GAP_BINS = 144
+
+
+class ProtocolStats:
+    # All accumulators are fixed-size, so a capture of any length is analysed
+    # in constant memory.
+    def __init__(self):
+        self.decoder = PacketDecoder()
+        self.samples = 0
+        self.valid_points = 0
+        self.invalid_distance = 0
+        self.rotations = 0
+        self.bad_angle_packets = 0
+        self.packet_len_hist = np.zeros(MAX_PACKET_LEN + 1, dtype=np.int64)
+        self.gap_hist = np.zeros(GAP_BINS + 1, dtype=np.int64)
+        self.quality_hist = np.zeros(256, dtype=np.int64)
+        self.type_hist = np.zeros(256, dtype=np.int64)
+        self._last_start = None
+        self._last_end = None
+        # (packets, valid points) with sane angles seen before the first and
+        # the latest wrap, so per-rotation figures skip the partial rotations
+        # at either end.
+        self._good_packets = 0
+        self._good_points = 0
+        self._first_wrap = None
+        self._last_wrap = None
+
+    def update(self, data):
+        batch = self.decoder.feed(data)
+        if not len(batch.count):
+            return batch
+
+        lengths = PACKET_HEADER_LEN + batch.count * 3
+        self.packet_len_hist += np.bincount(lengths, minlength=MAX_PACKET_LEN + 1)
+        self.type_hist += np.bincount(batch.lidar_type, minlength=256)
+        self.quality_hist += np.bincount(batch.quality, minlength=256)
+        self.samples += len(batch.quality)
+        valid = valid_mask(batch)
+        self.valid_points += int(np.count_nonzero(valid))
+        self.invalid_distance += int(np.count_nonzero(batch.distance >= INVALID_DISTANCE))
+
+        # Same rules as ScanAssembler.split_turns.
+        ok = angles_ok(batch.start_cdeg, batch.end_cdeg)
+        self.bad_angle_packets += int(np.count_nonzero(~ok))
+        index = np.flatnonzero(ok)
+        packets_before = self._good_packets
+        points_before = self._good_points
+        self._good_packets += len(index)
+        points = np.bincount(batch.packet[valid & ok[batch.packet]], minlength=len(batch.count))
+        self._good_points += int(points.sum())
+        if not len(index):
+            return batch
+        starts = batch.start_cdeg[index]
+        ends = batch.end_cdeg[index]
+        if self._last_end is None:
+            prev_start, prev_end, cur = starts[:-1], ends[:-1], starts[1:]
+        else:
+            prev_start = np.concatenate(([self._last_start], starts[:-1]))
+            prev_end = np.concatenate(([self._last_end], ends[:-1]))
+            cur = starts
+        gaps = (cur - prev_end) % FULL_TURN_CDEG
+        self.gap_hist += np.bincount(np.minimum(gaps // GAP_BIN_CDEG, GAP_BINS),
+                                     minlength=GAP_BINS + 1)
+        wraps = index[np.flatnonzero(is_wrap(cur, prev_start)) + (len(starts) - len(cur))]
+        self.rotations += len(wraps)
+        if len(wraps):
+            packets_at = packets_before + np.cumsum(ok) - ok
+            points_at = points_before + np.cumsum(points) - points
+            marks = [(int(packets_at[i]), int(points_at[i])) for i in (wraps[0], wraps[-1])]
+            if self._first_wrap is None:
+                self._first_wrap = marks[0]
+            self._last_wrap = marks[1]
+        self._last_start = int(starts[-1])
+        self._last_end = int(ends[-1])
+        return batch
+
+    def report(self, duration=None):
+        d = self.decoder
+        packets = d.packet_count
+        full = self.rotations - 1
+        if full > 0:
+            per_rotation = (
+                (self._last_wrap[0] - self._first_wrap[0]) / full,
+                (self._last_wrap[1] - self._first_wrap[1]) / full,
+            )
         else:
-            i += 1
-    
-    print("\n" + "="*70)
-    print("Analysis complete!")
+            per_rotation = (None, None)
+        lengths = np.flatnonzero(self.packet_len_hist)
+        qualities = np.flatnonzero(self.quality_hist)
+        types = np.flatnonzero(self.type_hist)
+        rep = {
+            "bytes": d.byte_count,
+            "packets": packets,
+            "samples": self.samples,
+            "valid_points": self.valid_points,
+            "invalid_distance": self.invalid_distance,
+            "garbage_bytes": d.garbage_bytes,
+            "garbage_ratio": d.garbage_bytes / d.byte_count if d.byte_count else 0.0,
+            "resyncs": d.resyncs,
+            "bad_angle_packets": self.bad_angle_packets,
+            "rotations": self.rotations,
+            "full_rotations": max(full, 0),
+            "packets_per_rotation": per_rotation[0],
+            "points_per_rotation": per_rotation[1],
+            "duration_s": duration,
+            "packets_per_s": None,
+            "points_per_s": None,
+            "rotation_hz": None,
+            "lidar_types": {f"0x{t:02X}": int(self.type_hist[t]) for t in types},
+            "packet_length_hist": {int(n): int(self.packet_len_hist[n]) for n in lengths},
+            "angle_gap_hist": {
+                "bin_deg": GAP_BIN_CDEG / 100.0,
+                "counts": self.gap_hist[:GAP_BINS].tolist(),
+                "overflow": int(self.gap_hist[GAP_BINS]),
+            },
+            "quality_hist": {int(q): int(self.quality_hist[q]) for q in qualities},
+        }
+        if duration:
+            rep["packets_per_s"] = packets / duration
+            rep["points_per_s"] = self.valid_points / duration
+            rep["rotation_hz"] = self.rotations / duration
+        return rep
+
+
+def read_capture(path, chunk_size=CHUNK_SIZE):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def read_port(port, duration, record=None):
+    ser = serial.serial_for_url(port, BAUD_RATE, timeout=0.05)
+    ser.reset_input_buffer()
+    out = open(record, "wb") if record else None
+    start = time.time()
+    try:
+        while time.time() - start < duration:
+            chunk = ser.read(4096)
+            if chunk:
+                if out:
+                    out.write(chunk)
+                yield chunk
+    finally:
+        ser.close()
+        if out:
+            out.close()
+
+
+def record_path(record, port, many):
+    # One recording per port: with several --port options the port name is
+    # added before the extension instead of every port overwriting the file.
+    if not record or not many:
+        return record
+    root, ext = os.path.splitext(record)
+    return f"{root}-{re.sub(r'[^A-Za-z0-9]+', '_', port).strip('_')}{ext}"
+
+
+def dump_packets(batch, first_index, limit, file=sys.stderr):
+    shown = 0
+    for i in range(min(len(batch.count), limit)):
+        sel = batch.packet == i
+        print(f"Packet #{first_index + i + 1}", file=file)
+        print(f"  Lidar Type:    0x{int(batch.lidar_type[i]):02X}", file=file)
+        print(f"  Measurements:  {int(batch.count[i])}", file=file)
+        print(f"  Start Angle:   {batch.start_cdeg[i] / 100:.2f}°", file=file)
+        print(f"  End Angle:     {batch.end_cdeg[i] / 100:.2f}°", file=file)
+        for angle, dist, q in list(zip(batch.angle[sel], batch.distance[sel], batch.quality[sel]))[:5]:
+            print(f"    {angle:7.2f}°  {int(dist):6d} mm  q={int(q)}", file=file)
+        shown += 1
+    return shown
+
+
+def analyze(chunks, dump=0):
+    stats = ProtocolStats()
+    dumped = 0
+    start = time.time()
+    try:
+        for chunk in chunks:
+            batch = stats.update(chunk)
+            if dumped < dump:
+                dumped += dump_packets(batch, dumped, dump - dumped)
+    except KeyboardInterrupt:
+        pass
+    stats.decoder.finish()
+    return stats, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Streaming MB-1R2T protocol analyzer. Prints one JSON report per source.")
+    parser.add_argument("captures", nargs="*", help="raw capture files to analyse")
+    parser.add_argument("--port", action="append", default=[],
+                        help="live serial port (repeatable; default: auto-detect when no captures)")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="seconds to read from each live port")
+    parser.add_argument("--record",
+                        help="save the raw bytes of a live port to this file "
+                             "(with several ports, the port name is added to the name)")
+    parser.add_argument("--seconds", type=float,
+                        help="capture length in seconds, used to compute rates for capture files")
+    parser.add_argument("--dump", type=int, default=0, metavar="N",
+                        help="print the first N decoded packets to stderr")
+    parser.add_argument("--pretty", action="store_true", help="indent the JSON output")
+    args = parser.parse_args()
+
+    ports = args.port
+    if not ports and not args.captures:
+        port = find_lidar_port()
+        if not port:
+            print("No LiDAR detected - pass --port or a capture file", file=sys.stderr)
+            return 1
+        ports = [port]
+
+    status = 0
+    for port in ports:
+        try:
+            record = record_path(args.record, port, len(ports) > 1)
+            stats, elapsed = analyze(read_port(port, args.duration, record), args.dump)
+        except serial.SerialException as e:
+            print(json.dumps({"source": port, "error": str(e)}))
+            status = 1
+            continue
+        rep = {"source": port, "live": True}
+        rep.update(stats.report(elapsed))
+        print(json.dumps(rep, indent=2 if args.pretty else None))
+
+    for path in args.captures:
+        try:
+            stats, _ = analyze(read_capture(path), args.dump)
+        except OSError as e:
+            print(json.dumps({"source": path, "error": str(e)}))
+            status = 1
+            continue
+        rep = {"source": path, "live": False}
+        rep.update(stats.report(args.seconds))
+        print(json.dumps(rep, indent=2 if args.pretty else None))
+
+    return status
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+import threading
+
+# The snippets import the repo's modules, so they run from the repo root
+# wherever the benchmark itself is started from.
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_SNIPPET = """
+import sys, time
+t = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t
+print(dt, 'pygame' in sys.modules, 'OpenGL' in sys.modules, 'numpy' in sys.modules)
+"""
+
+FIRST_SCAN_SNIPPET = """
+import sys, time
+from bench_startup import open_synthetic_port
+port, start_feed = ({port!r}, None) if {port!r} else open_synthetic_port(3)
+t = time.perf_counter()
+import lidar_map
+lidar = lidar_map.LidarSerial(port)
+if start_feed:
+    start_feed()
+first_packet, first_scan = lidar_map.measure_first_scan(lidar, {timeout})
+lidar.close()
+total = None if first_scan is None else time.perf_counter() - t
+print(first_packet, first_scan, total, 'pygame' in sys.modules, 'numpy' in sys.modules)
+"""
+
+# The path the GUI and headless mode take: supervisor thread, PacketDecoder,
+# ScanBuffer, and the first Scan read back through ring.latest().
+SUPERVISED_SNIPPET = """
+import sys, time
+from bench_startup import open_synthetic_port
+port, start_feed = ({port!r}, None) if {port!r} else open_synthetic_port(3)
+t = time.perf_counter()
+import lidar_map
+lidar = lidar_map.ConnectionSupervisor(port).start()
+scans = lidar_map.ScanBuffer()
+start = None
+first_packet = first_scan = None
+while time.perf_counter() - t < {timeout}:
+    if start is None and lidar.connected:
+        start = time.perf_counter()
+        if start_feed:
+            start_feed()
+    for batch, stamp in lidar.read_batches():
+        if batch is None:
+            scans.break_stream()
+        else:
+            scans.add_batch(batch, stamp)
+    if start is not None:
+        if first_packet is None and lidar.packet_count:
+            first_packet = time.perf_counter() - start
+        if scans.ring.latest() is not None:
+            first_scan = time.perf_counter() - start
+            break
+    time.sleep(0.002)
+total = None if first_scan is None else time.perf_counter() - t
+lidar.close()
+print(first_packet, first_scan, total, 'pygame' in sys.modules, 'numpy' in sys.modules)
+"""
+
+
+def make_packet(start_cdeg, end_cdeg, samples):
+    pkt = bytearray([0xAA, 0x55, 0x00, len(samples)])
+    pkt += (start_cdeg % 36000).to_bytes(2, "little")
+    pkt += (end_cdeg % 36000).to_bytes(2, "little")
+    pkt += b"\x00\x00"
+    for quality, distance in samples:
+        pkt.append(quality)
+        pkt += distance.to_bytes(2, "little")
+    return bytes(pkt)
+
+
+def synth_stream(rotations, packets_per_rotation=36, samples_per_packet=20):
+    step = 36000 // packets_per_rotation
+    out = bytearray()
+    for _ in range(rotations):
+        for k in range(packets_per_rotation):
+            start = k * step
+            end = start + step - step // samples_per_packet
+            samples = [(200, 1000 + 10 * ((k + i) % 100)) for i in range(samples_per_packet)]
+            out += make_packet(start, end, samples)
+    return bytes(out)
+
+
+def open_synthetic_port(rotations):
+    # A pseudo-terminal stands in for the FT232RL so the benchmark exercises
+    # the real serial stack without hardware. Feeding starts once the port is
+    # open, since LidarSerial flushes the input buffer on open. Unix only, so
+    # tty is imported here and --port still works on Windows.
+    import tty
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    data = synth_stream(rotations)
+
+    def feed():
+        view = memoryview(data)
+        while view:
+            view = view[os.write(master, view):]
+
+    def start():
+        threading.Thread(target=feed, daemon=True).start()
+
+    return os.ttyname(slave), start
+
+
+def _run(snippet, repeat):
+    results = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", snippet], cwd=REPO_DIR,
+                             capture_output=True, text=True, check=True)
+        results.append(out.stdout.splitlines()[-1].split())
+    return results
+
+
+def _num(value):
+    return None if value == "None" else float(value)
+
+
+def bench_import(module, repeat):
+    runs = _run(IMPORT_SNIPPET.format(module=module), repeat)
+    return {
+        "module": module,
+        "import_ms": statistics.median(float(r[0]) for r in runs) * 1000,
+        "loads_pygame": runs[0][1] == "True",
+        "loads_opengl": runs[0][2] == "True",
+        "loads_numpy": runs[0][3] == "True",
+    }
+
+
+def bench_first_scan(port, timeout, repeat, snippet=FIRST_SCAN_SNIPPET):
+    runs = _run(snippet.format(port=port, timeout=timeout), repeat)
+    ok = [r for r in runs if r[1] != "None"]
+    if not ok:
+        return {"port": port, "first_packet_ms": None, "first_scan_ms": None,
+                "process_to_first_scan_ms": None}
+    return {
+        "port": port,
+        "first_packet_ms": statistics.median(_num(r[0]) for r in ok) * 1000,
+        "first_scan_ms": statistics.median(_num(r[1]) for r in ok) * 1000,
+        "process_to_first_scan_ms": statistics.median(_num(r[2]) for r in ok) * 1000,
+        "loads_pygame": ok[0][3] == "True",
+        "loads_numpy": ok[0][4] == "True",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark")
+    parser.add_argument("--port",
+                        help="serial port for time-to-first-scan (default: synthetic pty stream)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    report = {
+        "imports": [bench_import(m, args.repeat) for m in ("lidar_core", "lidar_map", "lidar_gui")],
+        "first_scan": bench_first_scan(args.port, args.timeout, args.repeat),
+        "first_scan_supervised": bench_first_scan(args.port, args.timeout, args.repeat,
+                                                  SUPERVISED_SNIPPET),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("Import time (median of %d):" % args.repeat)
+    for r in report["imports"]:
+        extra = []
+        if r["loads_numpy"]:
+            extra.append("numpy")
+        if r["loads_pygame"]:
+            extra.append("pygame")
+        if r["loads_opengl"]:
+            extra.append("OpenGL")
+        print(f"  {r['module']:<12} {r['import_ms']:8.1f} ms  loads: {', '.join(extra) or '-'}")
+    for key, label in (("first_scan", "probe"), ("first_scan_supervised", "supervisor + ScanBuffer")):
+        fs = report[key]
+        print(f"Time to first scan on {fs['port'] or 'synthetic pty'} ({label}):")
+        if fs["first_scan_ms"] is None:
+            print("  no full rotation received")
+        else:
+            print(f"  first packet       {fs['first_packet_ms']:8.1f} ms")
+            print(f"  first scan         {fs['first_scan_ms']:8.1f} ms")
+            print(f"  process to scan    {fs['process_to_first_scan_ms']:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import json
+import argparse
+import numpy as np
+
+from lidar_tracking import ObjectTracker
+
+ROTATION_PERIOD_MS = 100.0
+
+
+def synth_scene(rng, objects, wall_points, t):
+    # Square room with 4 m half-width walls, plus small objects (about 20
+    # samples each) laid out on a 900 mm grid, each circling its grid cell.
+    angle = np.linspace(0, 2 * np.pi, wall_points, endpoint=False)
+    r = 4000.0 / np.maximum(np.abs(np.cos(angle)), np.abs(np.sin(angle)))
+    walls = np.column_stack((r * np.cos(angle), r * np.sin(angle)))
+
+    side = int(np.ceil(np.sqrt(objects)))
+    k = np.arange(objects)
+    grid = np.column_stack((k % side, k // side)) * 900.0 - (side - 1) * 450.0
+    phase = 2 * np.pi * k / objects + t * 2.0 * np.where(k % 2, 1, -1)
+    centres = grid + 150.0 * np.column_stack((np.cos(phase), np.sin(phase)))
+    blob = rng.normal(0.0, 60.0, (objects, 20, 2))
+    parts = (centres[:, None, :] + blob).reshape(-1, 2)
+    return np.concatenate((walls, parts)), centres
+
+
+def run(objects, wall_points, rotations, seed):
+    rng = np.random.default_rng(seed)
+    tracker = ObjectTracker()
+    times = []
+    for i in range(rotations):
+        t = i * ROTATION_PERIOD_MS / 1000.0
+        xy, _ = synth_scene(rng, objects, wall_points, t)
+        tracker.update(xy, stamp=t)
+        times.append(tracker.last_ms)
+    times = np.array(times[1:])
+    return {
+        "objects": objects,
+        "points_per_scan": wall_points + objects * 20,
+        "rotations": rotations,
+        "tracked": len(tracker.objects),
+        "ids_issued": tracker.next_id - 1,
+        "mean_ms": float(times.mean()),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p99_ms": float(np.percentile(times, 99)),
+        "max_ms": float(times.max()),
+        "budget_ms": ROTATION_PERIOD_MS,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clustering/tracking cost per rotation")
+    parser.add_argument("--objects", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--wall-points", type=int, default=720)
+    parser.add_argument("--rotations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(n, args.wall_points, args.rotations, args.seed) for n in args.objects]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'objects':>7} {'points':>7} {'tracked':>7} {'ids':>5} "
+          f"{'mean ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for r in results:
+        print(f"{r['objects']:7d} {r['points_per_scan']:7d} {r['tracked']:7d} {r['ids_issued']:5d} "
+              f"{r['mean_ms']:8.2f} {r['p99_ms']:8.2f} {r['max_ms']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
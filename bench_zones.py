@@ -0,0 +1,87 @@
+import json
+import time
+import argparse
+import numpy as np
+
+from lidar_core import Scan, SCAN_SIZE
+from lidar_zones import SectorZone, BandZone, PolygonZone, ZoneMonitor
+
+ROTATION_PERIOD_MS = 100.0
+
+
+def make_zones(count):
+    # Cycle through sectors, bands and polygons spread around the sensor.
+    zones = []
+    for k in range(count):
+        a = k * 360.0 / max(count, 1)
+        if k % 3 == 0:
+            zones.append(SectorZone(f"sector{k}", a, a + 15, 2500, 500))
+        elif k % 3 == 1:
+            zones.append(BandZone(f"band{k}", 100 + 40 * k, 140 + 40 * k))
+        else:
+            c = np.array([np.cos(np.radians(a)), np.sin(np.radians(a))]) * 3000
+            zones.append(PolygonZone(f"poly{k}", c + [[-300, -300], [300, -300], [0, 400]]))
+    return zones
+
+
+def synth_scan(rng, index, points, t):
+    # Room walls at 3-5 m plus a person-sized blob that walks around the
+    # sensor, so zones keep entering and exiting.
+    angle = np.sort(rng.uniform(0, 360, points))
+    distance = (4000 + 1000 * np.sin(np.radians(angle) * 3)).astype(np.int64)
+    walker = np.abs((angle - (t * 36.0) % 360.0 + 180) % 360 - 180) < 4
+    distance[walker] = 1500
+    rad = np.radians(angle)
+    stamp = t + np.linspace(0, ROTATION_PERIOD_MS / 1000.0, points)
+    return Scan(index, angle, distance, np.full(points, 200), np.column_stack(
+        (distance * np.cos(rad), distance * np.sin(rad))), stamp, t,
+        t + ROTATION_PERIOD_MS / 1000.0, ROTATION_PERIOD_MS / 1000.0, 1.0, 36)
+
+
+def run(zones, points, rotations, seed):
+    rng = np.random.default_rng(seed)
+    t0 = time.perf_counter()
+    monitor = ZoneMonitor(make_zones(zones))
+    compile_ms = (time.perf_counter() - t0) * 1000.0
+    times = []
+    for i in range(rotations):
+        monitor.update(synth_scan(rng, i + 1, points, i * ROTATION_PERIOD_MS / 1000.0))
+        times.append(monitor.last_ms)
+    times = np.array(times[1:])
+    return {
+        "zones": zones,
+        "points_per_scan": points,
+        "rotations": rotations,
+        "events": monitor.event_count,
+        "compile_ms": compile_ms,
+        "mean_ms": float(times.mean()),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p99_ms": float(np.percentile(times, 99)),
+        "max_ms": float(times.max()),
+        "budget_ms": ROTATION_PERIOD_MS,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zone-intrusion cost per rotation")
+    parser.add_argument("--zones", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--points", type=int, default=SCAN_SIZE)
+    parser.add_argument("--rotations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(n, args.points, args.rotations, args.seed) for n in args.zones]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'zones':>5} {'points':>7} {'events':>7} {'compile ms':>10} "
+          f"{'mean ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for r in results:
+        print(f"{r['zones']:5d} {r['points_per_scan']:7d} {r['events']:7d} {r['compile_ms']:10.1f} "
+              f"{r['mean_ms']:8.3f} {r['p99_ms']:8.3f} {r['max_ms']:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
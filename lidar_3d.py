@@ -0,0 +1,374 @@
+import math
+import ctypes
+from pygame.locals import *
+from OpenGL.GL import *
+from OpenGL.GLU import *
+from OpenGL.GL.shaders import compileShader, compileProgram
+
+from lidar_core import SCAN_SIZE
+
+HISTORY_VERTEX_SHADER = """
+#version 120
+attribute vec3 a_point;
+uniform float u_current;
+uniform float u_history;
+uniform float u_height;
+varying float v_fade;
+
+void main() {
+    float age = u_current - a_point.z;
+    if (age < 0.0 || age >= u_history) {
+        v_fade = 0.0;
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);
+        return;
+    }
+    v_fade = 1.0 - age / u_history;
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(a_point.x, u_height, a_point.y, 1.0);
+}
+"""
+
+HISTORY_FRAGMENT_SHADER = """
+#version 120
+varying float v_fade;
+
+void main() {
+    gl_FragColor = vec4(0.0, 0.25 + 0.75 * v_fade, 0.12 + 0.28 * v_fade,
+                        0.08 + 0.72 * v_fade * v_fade);
+}
+"""
+
+
+class GpuScanRing:
+    # GPU mirror of a ScanHistory. The whole ring lives in one VBO; after the
+    # initial upload only slots rewritten since the last frame are sent, and
+    # the vertex shader fades each point by its scan index, so drawing the
+    # full history is a single draw call regardless of its length.
+    def __init__(self, history):
+        self.history = history
+        self.vbo = None
+        self.program = None
+        self.failed = False
+
+    def init_gl(self):
+        if self.failed:
+            return
+        if self.program is not None and glIsProgram(self.program) and glIsBuffer(self.vbo):
+            # The context survived the mode change (e.g. a fullscreen toggle),
+            # so the program and the uploaded ring are still valid.
+            return
+        self.release()
+        try:
+            self.program = compileProgram(
+                compileShader(HISTORY_VERTEX_SHADER, GL_VERTEX_SHADER),
+                compileShader(HISTORY_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+            )
+        except Exception as e:
+            print(f"Point-cloud history unavailable: {e}")
+            self.failed = True
+            return
+        self._a_point = glGetAttribLocation(self.program, "a_point")
+        self._u_current = glGetUniformLocation(self.program, "u_current")
+        self._u_history = glGetUniformLocation(self.program, "u_history")
+        self._u_height = glGetUniformLocation(self.program, "u_height")
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        vertices = self.history.vertices
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.history.take_dirty()
+
+    def release(self):
+        # Must run while the owning context is current, i.e. before the
+        # display mode is switched away from OpenGL.
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+        if self.program is not None:
+            glDeleteProgram(self.program)
+        self.vbo = None
+        self.program = None
+
+    def _sync(self):
+        dirty = self.history.take_dirty()
+        if not dirty:
+            return
+        vertices = self.history.vertices
+        slot_bytes = vertices[0].nbytes
+        for slot in dirty:
+            glBufferSubData(GL_ARRAY_BUFFER, slot * slot_bytes, slot_bytes, vertices[slot])
+
+    def draw(self, height):
+        if self.vbo is None or self.history.latest < 0:
+            return
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        self._sync()
+        glUseProgram(self.program)
+        glUniform1f(self._u_current, float(self.history.latest))
+        glUniform1f(self._u_history, float(self.history.scans))
+        glUniform1f(self._u_height, height)
+        glEnableVertexAttribArray(self._a_point)
+        glVertexAttribPointer(self._a_point, 3, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+        glDepthMask(GL_FALSE)
+        glPointSize(2)
+        glDrawArrays(GL_POINTS, 0, self.history.scans * self.history.slot_points)
+        glDepthMask(GL_TRUE)
+        glDisableVertexAttribArray(self._a_point)
+        glUseProgram(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+
+class Lidar3DView:
+    WALL_HEIGHT = 200.0
+    OBJECT_HEIGHT = 400.0
+    GROUND_SIZE = 15000.0
+    GROUND_GRID_STEP = 1000.0
+
+    def __init__(self, width, height, history=None):
+        self.width = width
+        self.height = height
+        self.ring = GpuScanRing(history) if history is not None else None
+        self.cam_dist = 8000.0
+        self.cam_pitch = 35.0
+        self.cam_yaw = 45.0
+        self.cam_target = [0.0, 0.0, 0.0]
+        self._dragging = False
+        self._last_mouse = (0, 0)
+        self._panning = False
+
+    def init_gl(self, width, height):
+        self.width = width
+        self.height = height
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glEnable(GL_LINE_SMOOTH)
+        glHint(GL_LINE_SMOOTH_HINT, GL_NICEST)
+        glClearColor(0.06, 0.06, 0.08, 1.0)
+        self._setup_projection()
+        if self.ring:
+            self.ring.init_gl()
+
+    def release_gl(self):
+        if self.ring:
+            self.ring.release()
+
+    def _setup_projection(self):
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(50, self.width / max(1, self.height), 50, 50000)
+        glMatrixMode(GL_MODELVIEW)
+
+    def handle_event(self, event):
+        if event.type == MOUSEBUTTONDOWN:
+            if event.button == 1:
+                self._dragging = True
+                self._last_mouse = event.pos
+            elif event.button == 3:
+                self._panning = True
+                self._last_mouse = event.pos
+            elif event.button == 4:
+                self.cam_dist = max(1000, self.cam_dist - 500)
+            elif event.button == 5:
+                self.cam_dist = min(20000, self.cam_dist + 500)
+        elif event.type == MOUSEBUTTONUP:
+            if event.button == 1:
+                self._dragging = False
+            elif event.button == 3:
+                self._panning = False
+        elif event.type == MOUSEMOTION:
+            if self._dragging:
+                dx = event.pos[0] - self._last_mouse[0]
+                dy = event.pos[1] - self._last_mouse[1]
+                self.cam_yaw += dx * 0.4
+                self.cam_pitch = max(5, min(85, self.cam_pitch + dy * 0.4))
+                self._last_mouse = event.pos
+            elif self._panning:
+                dx = event.pos[0] - self._last_mouse[0]
+                dy = event.pos[1] - self._last_mouse[1]
+                yaw_rad = math.radians(self.cam_yaw)
+                self.cam_target[0] -= (math.cos(yaw_rad) * dx + math.sin(yaw_rad) * dy) * 5
+                self.cam_target[2] -= (-math.sin(yaw_rad) * dx + math.cos(yaw_rad) * dy) * 5
+                self._last_mouse = event.pos
+
+    def _set_camera(self):
+        glLoadIdentity()
+        pitch_rad = math.radians(self.cam_pitch)
+        yaw_rad = math.radians(self.cam_yaw)
+        cx = self.cam_target[0] + self.cam_dist * math.cos(pitch_rad) * math.cos(yaw_rad)
+        cy = self.cam_target[1] + self.cam_dist * math.sin(pitch_rad)
+        cz = self.cam_target[2] + self.cam_dist * math.cos(pitch_rad) * math.sin(yaw_rad)
+        gluLookAt(cx, cy, cz,
+                  self.cam_target[0], self.cam_target[1], self.cam_target[2],
+                  0, 1, 0)
+
+    def _draw_ground(self):
+        gs = self.GROUND_SIZE
+        step = self.GROUND_GRID_STEP
+        glBegin(GL_QUADS)
+        glColor4f(0.08, 0.08, 0.10, 0.8)
+        glVertex3f(-gs, 0, -gs)
+        glVertex3f(gs, 0, -gs)
+        glVertex3f(gs, 0, gs)
+        glVertex3f(-gs, 0, gs)
+        glEnd()
+
+        glBegin(GL_LINES)
+        glColor4f(0.15, 0.15, 0.20, 0.6)
+        v = -gs
+        while v <= gs:
+            glVertex3f(v, 0.5, -gs)
+            glVertex3f(v, 0.5, gs)
+            glVertex3f(-gs, 0.5, v)
+            glVertex3f(gs, 0.5, v)
+            v += step
+        glEnd()
+
+        glBegin(GL_LINES)
+        for r_m in range(1, 7):
+            r = r_m * 1000
+            segs = 72
+            glColor4f(0.15, 0.2, 0.15, 0.4)
+            for i in range(segs):
+                a1 = 2 * math.pi * i / segs
+                a2 = 2 * math.pi * (i + 1) / segs
+                glVertex3f(r * math.cos(a1), 1, r * math.sin(a1))
+                glVertex3f(r * math.cos(a2), 1, r * math.sin(a2))
+        glEnd()
+
+    def _draw_origin(self):
+        glPointSize(8)
+        glBegin(GL_POINTS)
+        glColor3f(1.0, 0.24, 0.24)
+        glVertex3f(0, 2, 0)
+        glEnd()
+
+        glBegin(GL_LINES)
+        glColor3f(1.0, 0.3, 0.3)
+        glVertex3f(0, 0, 0)
+        glVertex3f(0, self.WALL_HEIGHT * 1.5, 0)
+        glEnd()
+
+    def _draw_objects(self, objects):
+        h = self.OBJECT_HEIGHT
+        for obj in objects:
+            x1, z1 = obj.bbox_min
+            x2, z2 = obj.bbox_max
+            if obj.missed == 0:
+                glColor4f(1.0, 0.7, 0.0, 1.0)
+            else:
+                glColor4f(0.5, 0.35, 0.08, 0.8)
+            glBegin(GL_LINES)
+            for y in (1, h):
+                glVertex3f(x1, y, z1)
+                glVertex3f(x2, y, z1)
+                glVertex3f(x2, y, z1)
+                glVertex3f(x2, y, z2)
+                glVertex3f(x2, y, z2)
+                glVertex3f(x1, y, z2)
+                glVertex3f(x1, y, z2)
+                glVertex3f(x1, y, z1)
+            for x, z in ((x1, z1), (x2, z1), (x2, z2), (x1, z2)):
+                glVertex3f(x, 1, z)
+                glVertex3f(x, h, z)
+            cx, cz = obj.centroid
+            vx, vz = obj.velocity
+            glVertex3f(cx, h, cz)
+            glVertex3f(cx + vx, h, cz + vz)
+            glEnd()
+
+    def render(self, scan_data, max_range_m, show_walls, objects=(), show_history=False):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self._set_camera()
+        self._draw_ground()
+        self._draw_origin()
+        if show_history and self.ring:
+            self.ring.draw(1.5)
+        self._draw_objects(objects)
+
+        max_range_mm = max_range_m * 1000
+        screen_points = []
+
+        for i in range(SCAN_SIZE):
+            if scan_data[i] is None:
+                continue
+            distance, quality, age = scan_data[i]
+            if distance > max_range_mm:
+                continue
+            angle_deg = i / 2.0
+            rad = math.radians(angle_deg)
+            x = distance * math.cos(rad)
+            z = distance * math.sin(rad)
+            screen_points.append((x, z, age, i, distance))
+
+        if not screen_points:
+            return
+
+        glPointSize(4)
+        glBegin(GL_POINTS)
+        for x, z, age, idx, d in screen_points:
+            if age == 0:
+                glColor3f(0.0, 1.0, 0.4)
+            elif age == 1:
+                glColor3f(0.0, 0.86, 0.31)
+            else:
+                glColor3f(0.0, 0.4, 0.2)
+            glVertex3f(x, 2, z)
+        glEnd()
+
+        if show_walls and len(screen_points) >= 2:
+            sorted_pts = sorted(screen_points, key=lambda p: p[3])
+            wall_h = self.WALL_HEIGHT
+
+            for j in range(1, len(sorted_pts)):
+                x1, z1, age1, idx1, d1 = sorted_pts[j - 1]
+                x2, z2, age2, idx2, d2 = sorted_pts[j]
+
+                angle_gap = idx2 - idx1
+                if angle_gap > 10:
+                    continue
+
+                dx = x2 - x1
+                dz = z2 - z1
+                dist_2d = math.sqrt(dx * dx + dz * dz)
+                max_gap = max(100, 500 * (1.0 / max(0.1, max_range_m / 6.0)))
+                if dist_2d > max_gap:
+                    continue
+
+                max_age = max(age1, age2)
+                if max_age == 0:
+                    r, g, b = 0.0, 0.9, 0.4
+                elif max_age == 1:
+                    r, g, b = 0.0, 0.65, 0.3
+                else:
+                    r, g, b = 0.0, 0.4, 0.18
+
+                glBegin(GL_QUADS)
+                glColor4f(r, g, b, 0.5)
+                glVertex3f(x1, 0, z1)
+                glVertex3f(x2, 0, z2)
+                glColor4f(r, g, b, 0.8)
+                glVertex3f(x2, wall_h, z2)
+                glVertex3f(x1, wall_h, z1)
+                glEnd()
+
+                glBegin(GL_LINE_LOOP)
+                glColor4f(r, g, b, 1.0)
+                glVertex3f(x1, 0, z1)
+                glVertex3f(x2, 0, z2)
+                glVertex3f(x2, wall_h, z2)
+                glVertex3f(x1, wall_h, z1)
+                glEnd()
+
+            glBegin(GL_LINES)
+            glColor4f(0.0, 1.0, 0.4, 0.6)
+            for j in range(1, len(sorted_pts)):
+                x1, z1, _, idx1, _ = sorted_pts[j - 1]
+                x2, z2, _, idx2, _ = sorted_pts[j]
+                if idx2 - idx1 > 10:
+                    continue
+                dx = x2 - x1
+                dz = z2 - z1
+                if math.sqrt(dx*dx + dz*dz) > max_gap:
+                    continue
+                glVertex3f(x1, wall_h, z1)
+                glVertex3f(x2, wall_h, z2)
+            glEnd()
@@ -0,0 +1,530 @@
+import time
+import platform as platform_mod
+from collections import namedtuple
+import serial
+import serial.tools.list_ports
+
+
+class _LazyNumpy:
+    # numpy takes ~100 ms to import and the probe path never needs it. The
+    # first attribute access swaps the real module into this global.
+    def __getattr__(self, name):
+        global np
+        import numpy as np
+        return getattr(np, name)
+
+
+np = _LazyNumpy()
+
+BAUD_RATE = 153600
+SCAN_SIZE = 720
+MAX_DISTANCE = 12000
+INVALID_DISTANCE = 16000
+MIN_QUALITY = 10
+POINT_FADE_SCANS = 3
+HISTORY_SCANS = 600
+SCAN_RING_SIZE = 64
+HISTORY_SLOT_POINTS = 1024
+
+
+def find_lidar_port():
+    ports = serial.tools.list_ports.comports()
+    for port in ports:
+        device = port.device.lower()
+        if platform_mod.system() == "Darwin":
+            if "usbserial" in device or "cu.usb" in device:
+                return port.device
+        elif platform_mod.system() == "Windows":
+            desc = (port.description or "").lower()
+            if "com" in device and ("ftdi" in desc or "usb" in desc or "serial" in desc):
+                return port.device
+        else:
+            if "ttyusb" in device or "ttyacm" in device:
+                return port.device
+    for port in ports:
+        if "usb" in port.device.lower():
+            return port.device
+    return None
+
+
+PACKET_HEADER_LEN = 10
+MAX_MEASUREMENTS = 100
+MAX_PACKET_LEN = PACKET_HEADER_LEN + MAX_MEASUREMENTS * 3
+FULL_TURN_CDEG = 36000
+WRAP_DROP_CDEG = 18000
+
+PacketBatch = namedtuple("PacketBatch", [
+    # one entry per packet
+    "lidar_type", "count", "start_cdeg", "end_cdeg",
+    # one entry per measurement
+    "packet", "angle", "distance", "quality",
+])
+
+
+class PacketDecoder:
+    # Streaming AA 55 packet decoder. Only the unfinished tail of the previous
+    # chunk is carried over, so memory stays bounded by MAX_PACKET_LEN no matter
+    # how much data is fed through it.
+    def __init__(self):
+        self._carry = b""
+        self.byte_count = 0
+        self.packet_count = 0
+        self.garbage_bytes = 0
+        self.resyncs = 0
+
+    def resync(self):
+        self._skip(len(self._carry))
+        self._carry = b""
+
+    def finish(self):
+        # End of stream: an unfinished packet can never complete.
+        self.garbage_bytes += len(self._carry)
+        self._carry = b""
+
+    def _skip(self, n):
+        if n > 0:
+            self.garbage_bytes += n
+            self.resyncs += 1
+
+    def feed(self, data):
+        self.byte_count += len(data)
+        buf = self._carry + bytes(data)
+        arr = np.frombuffer(buf, dtype=np.uint8)
+        n = len(arr)
+
+        heads = np.flatnonzero((arr[:-1] == 0xAA) & (arr[1:] == 0x55))
+        counts = np.zeros(len(heads), dtype=np.int64)
+        has_count = heads + 3 < n
+        counts[has_count] = arr[heads[has_count] + 3]
+
+        starts = []
+        pos = 0
+        tail = None
+        for head, count in zip(heads.tolist(), counts.tolist()):
+            if head < pos:
+                continue
+            if head + PACKET_HEADER_LEN > n:
+                tail = head
+                break
+            if count == 0 or count > MAX_MEASUREMENTS:
+                continue
+            if head + PACKET_HEADER_LEN + count * 3 > n:
+                tail = head
+                break
+            self._skip(head - pos)
+            starts.append(head)
+            pos = head + PACKET_HEADER_LEN + count * 3
+
+        if tail is None:
+            tail = n - 1 if n and arr[-1] == 0xAA else n
+            tail = max(tail, pos)
+        self._skip(tail - pos)
+        self._carry = buf[tail:]
+        self.packet_count += len(starts)
+
+        return decode_packets(arr, np.array(starts, dtype=np.int64))
+
+
+def angles_ok(start_cdeg, end_cdeg):
+    # Packets with an angle past 360 deg are corrupt and take no part in wrap
+    # or gap detection. Like is_wrap, works on ints and on arrays, so the
+    # assembler, the probe and the analyzer all share one rule.
+    return (start_cdeg < FULL_TURN_CDEG) & (end_cdeg < FULL_TURN_CDEG)
+
+
+def is_wrap(start_cdeg, prev_start_cdeg):
+    return start_cdeg < prev_start_cdeg - WRAP_DROP_CDEG
+
+
+def split_packets(buf):
+    # Pure-Python twin of PacketDecoder.feed used by the probe, so checking
+    # that the sensor streams does not import numpy. Returns (start, end)
+    # angles in centidegrees of the complete packets in buf and the
+    # unfinished tail to carry over. tests/test_stream.py keeps the two in step.
+    starts = []
+    pos = 0
+    while True:
+        head = buf.find(b"\xaa\x55", pos)
+        if head < 0:
+            keep = len(buf) - 1 if len(buf) > pos and buf[-1] == 0xAA else len(buf)
+            return starts, buf[keep:]
+        if head + PACKET_HEADER_LEN > len(buf):
+            return starts, buf[head:]
+        count = buf[head + 3]
+        if count == 0 or count > MAX_MEASUREMENTS:
+            pos = head + 1
+            continue
+        end = head + PACKET_HEADER_LEN + count * 3
+        if end > len(buf):
+            return starts, buf[head:]
+        starts.append((buf[head + 4] | (buf[head + 5] << 8), buf[head + 6] | (buf[head + 7] << 8)))
+        pos = end
+
+
+def decode_packets(arr, starts):
+    lidar_type = arr[starts + 2]
+    count = arr[starts + 3].astype(np.int64)
+    start_cdeg = arr[starts + 4] | (arr[starts + 5].astype(np.int64) << 8)
+    end_cdeg = arr[starts + 6] | (arr[starts + 7].astype(np.int64) << 8)
+
+    packet = np.repeat(np.arange(len(starts)), count)
+    first = np.cumsum(count) - count
+    within = np.arange(len(packet)) - first[packet]
+    offset = starts[packet] + PACKET_HEADER_LEN + within * 3
+    quality = arr[offset]
+    distance = arr[offset + 1] | (arr[offset + 2].astype(np.int64) << 8)
+
+    start_angle = start_cdeg / 100.0
+    end_angle = end_cdeg / 100.0
+    end_angle = np.where(end_angle < start_angle, end_angle + 360.0, end_angle)
+    step = (end_angle - start_angle) / np.maximum(count - 1, 1)
+    angle = (start_angle[packet] + within * step[packet]) % 360.0
+
+    return PacketBatch(lidar_type, count, start_cdeg, end_cdeg,
+                       packet, angle, distance, quality)
+
+
+def valid_mask(batch):
+    return ((batch.quality >= MIN_QUALITY)
+            & (batch.distance > 50) & (batch.distance < INVALID_DISTANCE))
+
+
+class LidarSerial:
+    def __init__(self, port, timeout=0, decoder=None):
+        self.ser = serial.serial_for_url(port, BAUD_RATE, timeout=timeout)
+        self.ser.reset_input_buffer()
+        self.decoder = decoder if decoder is not None else PacketDecoder()
+        self.packet_count = self.decoder.packet_count
+        self.points_per_sec = 0
+        self._pts_count = 0
+        self._pts_time = time.time()
+    
+    def read_bytes(self):
+        # Serial errors propagate so callers can tell an unplugged port from a
+        # quiet one. With a non-zero timeout this blocks until data arrives.
+        waiting = self.ser.in_waiting
+        if waiting > 0 or self.ser.timeout:
+            return self.ser.read(min(max(waiting, 1), 8192))
+        return b""
+    
+    def read_batch(self):
+        data = self.read_bytes()
+        stamp = time.time()
+        
+        batch = self.decoder.feed(data)
+        self.packet_count = self.decoder.packet_count
+        
+        self._pts_count += int(np.count_nonzero(valid_mask(batch)))
+        if stamp - self._pts_time >= 1.0:
+            self.points_per_sec = self._pts_count
+            self._pts_count = 0
+            self._pts_time = stamp
+        
+        return batch, stamp
+    
+    def read(self):
+        batch, _ = self.read_batch()
+        keep = valid_mask(batch)
+        return list(zip(batch.angle[keep].tolist(),
+                        batch.distance[keep].tolist(),
+                        batch.quality[keep].tolist()))
+    
+    def close(self):
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+
+
+class Scan(namedtuple("Scan", [
+    "index", "angle", "distance", "quality", "xy", "stamp",
+    "start_time", "end_time", "period", "coverage", "packets",
+])):
+    # One complete rotation. The arrays are read-only and shared by every
+    # consumer; `stamp` is the arrival time of each point's packet.
+    __slots__ = ()
+
+    @property
+    def rate_hz(self):
+        return 1.0 / self.period if self.period > 0 else 0.0
+
+    def __len__(self):
+        return len(self.angle)
+
+
+def _frozen(arr):
+    arr.flags.writeable = False
+    return arr
+
+
+class ScanRing:
+    def __init__(self, capacity=SCAN_RING_SIZE):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self.total = 0
+
+    def append(self, scan):
+        self._slots[self.total % self.capacity] = scan
+        self.total += 1
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("scan ring index out of range")
+        return self._slots[(self.total - n + i) % self.capacity]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def latest(self):
+        return self[-1] if self.total else None
+
+    def since(self, seen):
+        # Scans appended after a consumer's cursor, oldest first, plus the new
+        # cursor. A consumer more than `capacity` scans behind skips the
+        # overwritten ones.
+        n = len(self)
+        new = min(self.total - seen, n)
+        return ([self[i] for i in range(n - new, n)] if new > 0 else []), self.total
+
+
+class ScanAssembler:
+    # Splits the packet stream into rotations. A new rotation starts at a
+    # packet whose start angle is more than half a turn below the previous
+    # packet's, so dropped packets around 0 deg do not hide the wrap. Points
+    # past 360 deg in a packet that straddles 0 deg go to the next rotation.
+    # The partial rotation seen at start-up is discarded.
+    def __init__(self, ring_size=SCAN_RING_SIZE):
+        self.ring = ScanRing(ring_size)
+        self.turn = 0
+        self.scan_count = 0
+        self.rotation_hz = 0.0
+        self._prev_start = None
+        self._packet_turn = 0
+        self._turn_start = None
+        self._parts = []
+        self._packets = 0
+
+    def split_turns(self, batch):
+        ok = angles_ok(batch.start_cdeg, batch.end_cdeg)
+        starts = batch.start_cdeg[ok]
+        packet_turn = np.full(len(batch.count), -1, dtype=np.int64)
+        if len(starts):
+            prev = np.concatenate(([starts[0] if self._prev_start is None else self._prev_start],
+                                   starts[:-1]))
+            packet_turn[ok] = self._packet_turn + np.cumsum(is_wrap(starts, prev))
+            self._prev_start = int(starts[-1])
+            self._packet_turn = int(packet_turn[ok][-1])
+
+        keep = valid_mask(batch) & (packet_turn[batch.packet] >= 0)
+        packet = batch.packet[keep]
+        angle = batch.angle[keep]
+        straddle = angle < batch.start_cdeg[packet] / 100.0
+        turn = packet_turn[packet] + straddle
+        return angle, batch.distance[keep], batch.quality[keep], turn, packet_turn[ok]
+
+    def break_stream(self):
+        # Called when data was lost (e.g. the port dropped). The rotation in
+        # progress is discarded like the one at start-up, so no Scan ever
+        # joins data from both sides of the gap. Counters and the ring stay.
+        self._prev_start = None
+        self._turn_start = None
+        self._parts = []
+        self._packets = 0
+
+    def feed(self, batch, stamp=None):
+        angle, distance, quality, turn, packet_turn = self.split_turns(batch)
+        return self.add_points(angle, distance, quality, turn, packet_turn, stamp)
+
+    def add_points(self, angle, distance, quality, turn, packet_turn, stamp=None):
+        stamp = time.time() if stamp is None else stamp
+        scans = []
+        cuts = np.flatnonzero(np.diff(turn)) + 1
+        for lo, hi in zip(np.concatenate(([0], cuts)), np.concatenate((cuts, [len(turn)]))):
+            if lo == hi:
+                continue
+            t = int(turn[lo])
+            if t > self.turn:
+                self._advance(t, packet_turn, stamp, scans)
+            self._parts.append((angle[lo:hi], distance[lo:hi], quality[lo:hi], stamp))
+        if len(packet_turn) and packet_turn[-1] > self.turn:
+            # A wrap packet without valid points still closes the rotation.
+            self._advance(int(packet_turn[-1]), packet_turn, stamp, scans)
+        self._packets += int(np.count_nonzero(packet_turn == self.turn))
+        return scans
+
+    def _advance(self, turn, packet_turn, stamp, scans):
+        self._packets += int(np.count_nonzero(packet_turn == self.turn))
+        if self._turn_start is not None:
+            scans.append(self._close(stamp))
+        self.turn = turn
+        self._turn_start = stamp
+        self._parts = []
+        self._packets = 0
+
+    def _close(self, stamp):
+        parts = self._parts
+        if parts:
+            angle = np.concatenate([p[0] for p in parts])
+            distance = np.concatenate([p[1] for p in parts])
+            quality = np.concatenate([p[2] for p in parts])
+            stamps = np.repeat([p[3] for p in parts], [len(p[0]) for p in parts])
+        else:
+            angle = np.zeros(0)
+            distance = np.zeros(0, dtype=np.int64)
+            quality = np.zeros(0, dtype=np.uint8)
+            stamps = np.zeros(0)
+        period = stamp - self._turn_start
+        if period > 0:
+            hz = 1.0 / period
+            self.rotation_hz = hz if not self.rotation_hz else 0.8 * self.rotation_hz + 0.2 * hz
+        bins = (angle * 2).astype(np.int64) % SCAN_SIZE
+        rad = np.radians(angle)
+        scan = Scan(
+            index=self.scan_count + 1,
+            angle=_frozen(angle),
+            distance=_frozen(distance),
+            quality=_frozen(quality),
+            xy=_frozen(np.column_stack((distance * np.cos(rad), distance * np.sin(rad)))),
+            stamp=_frozen(stamps),
+            start_time=self._turn_start,
+            end_time=stamp,
+            period=period,
+            coverage=np.count_nonzero(np.bincount(bins, minlength=SCAN_SIZE)) / SCAN_SIZE,
+            packets=self._packets,
+        )
+        self.scan_count += 1
+        self.ring.append(scan)
+        return scan
+
+
+class ScanBuffer:
+    # Live 720-bin view for drawing: each bin keeps its newest point and the
+    # rotation it arrived in, so ages fall out of the assembler's turn count
+    # instead of being rewritten on every wrap.
+    def __init__(self, ring_size=SCAN_RING_SIZE):
+        self.ring_size = ring_size
+        self.reset()
+
+    def reset(self):
+        self.assembler = ScanAssembler(self.ring_size)
+        self._distance = np.zeros(SCAN_SIZE, dtype=np.int64)
+        self._quality = np.zeros(SCAN_SIZE, dtype=np.int64)
+        self._turn = np.full(SCAN_SIZE, -(1 << 40), dtype=np.int64)
+        self.last_angle = 0.0
+
+    @property
+    def ring(self):
+        return self.assembler.ring
+
+    @property
+    def scan_count(self):
+        return self.assembler.scan_count
+
+    def break_stream(self):
+        self.assembler.break_stream()
+
+    def add_batch(self, batch, stamp=None):
+        angle, distance, quality, turn, packet_turn = self.assembler.split_turns(batch)
+        if len(angle):
+            idx = (angle * 2).astype(np.int64) % SCAN_SIZE
+            self._distance[idx] = distance
+            self._quality[idx] = quality
+            self._turn[idx] = turn
+            self.last_angle = float(angle[-1])
+        return self.assembler.add_points(angle, distance, quality, turn, packet_turn, stamp)
+
+    def _ages(self):
+        age = self.assembler.turn - self._turn
+        return age, age <= POINT_FADE_SCANS + 1
+
+    def point_count(self):
+        return int(np.count_nonzero(self._ages()[1]))
+
+    @property
+    def data(self):
+        age, visible = self._ages()
+        d = self._distance.tolist()
+        q = self._quality.tolist()
+        a = age.tolist()
+        return [(d[i], q[i], a[i]) if v else None for i, v in enumerate(visible.tolist())]
+
+
+class ScanHistory:
+    # Fixed ring of the last `scans` rotations laid out exactly as the 3D view
+    # uploads it: one slot of (x, z, scan index) float32 vertices per rotation.
+    # Unused vertices carry a far-past scan index so the shader culls them.
+    EMPTY_INDEX = -1e9
+
+    def __init__(self, scans=HISTORY_SCANS, slot_points=HISTORY_SLOT_POINTS):
+        self.scans = scans
+        self.slot_points = slot_points
+        self.vertices = np.empty((scans, slot_points, 3), dtype=np.float32)
+        self.decimated = 0
+        self.reset()
+
+    def reset(self):
+        self.vertices[:, :, :2] = 0.0
+        self.vertices[:, :, 2] = self.EMPTY_INDEX
+        self.latest = -1
+        self.count = 0
+        self.dirty = set(range(self.scans))
+
+    def push(self, angle_deg, distance, scan_index):
+        slot = scan_index % self.scans
+        n = len(angle_deg)
+        if n > self.slot_points:
+            # Thin out evenly rather than cutting off the end of the rotation.
+            if not self.decimated:
+                print(f"Scan history: rotation of {n} points thinned to {self.slot_points}")
+            self.decimated += 1
+            keep = np.linspace(0, n - 1, self.slot_points).astype(np.int64)
+            angle_deg = angle_deg[keep]
+            distance = distance[keep]
+            n = self.slot_points
+        rad = np.radians(angle_deg)
+        dest = self.vertices[slot]
+        dest[:n, 0] = distance * np.cos(rad)
+        dest[:n, 1] = distance * np.sin(rad)
+        dest[:n, 2] = scan_index
+        dest[n:, 2] = self.EMPTY_INDEX
+        self.latest = scan_index
+        self.count = min(self.count + 1, self.scans)
+        self.dirty.add(slot)
+        return slot
+
+    def take_dirty(self):
+        dirty = sorted(self.dirty)
+        self.dirty = set()
+        return dirty
+
+
+def measure_first_scan(lidar, timeout=5.0):
+    # Same wrap rule as ScanAssembler: the first full rotation is complete at
+    # the second wrap, since the rotation before the first one is partial.
+    start = time.perf_counter()
+    first_packet = None
+    buf = b""
+    prev = None
+    wraps = 0
+    while time.perf_counter() - start < timeout:
+        packets, buf = split_packets(buf + lidar.read_bytes())
+        elapsed = time.perf_counter() - start
+        if first_packet is None and packets:
+            first_packet = elapsed
+        for angle, end in packets:
+            if not angles_ok(angle, end):
+                continue
+            if prev is not None and is_wrap(angle, prev):
+                wraps += 1
+            prev = angle
+        if wraps >= 2:
+            return first_packet, elapsed
+        time.sleep(0.002)
+    return first_packet, None
@@ -0,0 +1,499 @@
+import math
+import time
+import importlib.util
+import pygame
+from pygame.locals import *
+
+from lidar_core import SCAN_SIZE, ScanBuffer, ScanHistory
+from lidar_supervisor import ConnectionSupervisor
+from lidar_tracking import ObjectTracker
+from lidar_zones import ZoneMonitor
+
+HAS_OPENGL = importlib.util.find_spec("OpenGL") is not None
+
+BG_COLOR = (15, 15, 20)
+GRID_COLOR = (35, 35, 45)
+GRID_TEXT_COLOR = (60, 60, 80)
+CENTER_COLOR = (255, 60, 60)
+POINT_COLOR_FRESH = (0, 255, 100)
+POINT_COLOR_OLD = (0, 100, 50)
+WALL_COLOR = (0, 200, 80, 180)
+SWEEP_COLOR = (0, 255, 100, 30)
+TEXT_COLOR = (200, 200, 200)
+STATUS_GOOD = (0, 255, 100)
+STATUS_BAD = (255, 60, 60)
+STATUS_WARN = (255, 190, 60)
+EVENT_SHOW_SECONDS = 5.0
+OBJECT_COLOR = (255, 180, 0)
+ZONE_COLOR = (80, 140, 255)
+ZONE_HIT_COLOR = (255, 190, 60)
+ZONE_ALERT_COLOR = (255, 60, 60)
+
+
+class LidarMap:
+    def __init__(self, port=None, zones=()):
+        # Zones are compiled before the supervisor starts queueing batches,
+        # so the first frame does not have a backlog waiting behind it.
+        self.zones = ZoneMonitor(zones)
+        self._zone_shapes = [(zone.outline(), zone.anchor()) for zone in self.zones.zones]
+        self.lidar = ConnectionSupervisor(port).start()
+        
+        pygame.display.init()
+        pygame.font.init()
+        
+        info = pygame.display.Info()
+        self.width = min(1200, info.current_w - 100)
+        self.height = min(900, info.current_h - 100)
+        self.screen = pygame.display.set_mode((self.width, self.height), pygame.RESIZABLE)
+        pygame.display.set_caption("MB-1R2T LiDAR Map")
+        
+        self.font = pygame.font.SysFont("monospace", 14)
+        self.font_big = pygame.font.SysFont("monospace", 18, bold=True)
+        self.font_small = pygame.font.SysFont("monospace", 11)
+        
+        self.scans = ScanBuffer()
+        self._scans_seen = 0
+        self.tracker = ObjectTracker()
+        # The 7 MB history is only worth keeping when it can be drawn.
+        self.history = ScanHistory() if HAS_OPENGL else None
+        
+        self.zoom = 1.0
+        self.max_range_m = 6
+        self.show_walls = True
+        self.show_grid = True
+        self.show_objects = True
+        self.show_zones = True
+        self.show_history = False
+        self.fullscreen = False
+        self.mode_3d = False
+        self.has_opengl = HAS_OPENGL
+        self.view_3d = None
+        
+        self.clock = pygame.time.Clock()
+    
+    @property
+    def connected(self):
+        return self.lidar.connected
+    
+    @property
+    def port_name(self):
+        return self.lidar.port_name
+    
+    def _load_3d_view(self):
+        if self.view_3d is None and self.has_opengl:
+            try:
+                from lidar_3d import Lidar3DView
+            except ImportError as e:
+                print(f"3D view unavailable: {e}")
+                self.has_opengl = False
+                self.history = None
+                return None
+            self.view_3d = Lidar3DView(self.width, self.height, self.history)
+        return self.view_3d
+    
+    def _update_zoom(self):
+        center_x = self.width // 2
+        center_y = self.height // 2
+        usable = min(center_x, center_y) - 40
+        self.zoom = usable / (self.max_range_m * 1000)
+    
+    def _world_to_screen(self, x_mm, y_mm):
+        cx = self.width // 2
+        cy = self.height // 2
+        sx = cx + int(x_mm * self.zoom)
+        sy = cy - int(y_mm * self.zoom)
+        return sx, sy
+    
+    def _angle_to_xy(self, angle_deg, distance_mm):
+        rad = math.radians(angle_deg)
+        x = distance_mm * math.cos(rad)
+        y = distance_mm * math.sin(rad)
+        return x, y
+    
+    def _draw_grid(self):
+        if not self.show_grid:
+            return
+        
+        cx, cy = self.width // 2, self.height // 2
+        
+        for r_m in range(1, self.max_range_m + 1):
+            r_px = int(r_m * 1000 * self.zoom)
+            if r_px > 5:
+                pygame.draw.circle(self.screen, GRID_COLOR, (cx, cy), r_px, 1)
+                label = self.font_small.render(f"{r_m}m", True, GRID_TEXT_COLOR)
+                self.screen.blit(label, (cx + 5, cy - r_px - 14))
+        
+        max_r_px = int(self.max_range_m * 1000 * self.zoom)
+        for angle in range(0, 360, 45):
+            rad = math.radians(angle)
+            ex = cx + int(max_r_px * math.cos(rad))
+            ey = cy - int(max_r_px * math.sin(rad))
+            pygame.draw.line(self.screen, (25, 25, 35), (cx, cy), (ex, ey), 1)
+        
+        pygame.draw.circle(self.screen, CENTER_COLOR, (cx, cy), 5)
+        pygame.draw.circle(self.screen, (255, 100, 100), (cx, cy), 3)
+    
+    def _process_data(self):
+        for batch, stamp in self.lidar.read_batches():
+            if batch is None:
+                self.scans.break_stream()
+            else:
+                self.scans.add_batch(batch, stamp)
+        scans, self._scans_seen = self.scans.ring.since(self._scans_seen)
+        for scan in scans:
+            self.tracker.update(scan.xy, scan.end_time)
+            if self.history:
+                self.history.push(scan.angle, scan.distance, scan.index)
+            self.zones.update(scan)
+    
+    def _draw_scan(self):
+        max_range_mm = self.max_range_m * 1000
+        
+        screen_points = []
+        scan_data = self.scans.data
+        
+        for i in range(SCAN_SIZE):
+            if scan_data[i] is None:
+                continue
+            
+            distance, quality, age = scan_data[i]
+            
+            if distance > max_range_mm:
+                continue
+            
+            angle_deg = i / 2.0
+            x, y = self._angle_to_xy(angle_deg, distance)
+            sx, sy = self._world_to_screen(x, y)
+            
+            if 0 <= sx < self.width and 0 <= sy < self.height:
+                screen_points.append((sx, sy, age, i, distance))
+                
+                if age == 0:
+                    color = POINT_COLOR_FRESH
+                    size = 4
+                elif age == 1:
+                    color = (0, 220, 80)
+                    size = 3
+                else:
+                    color = POINT_COLOR_OLD
+                    size = 2
+                
+                pygame.draw.circle(self.screen, color, (sx, sy), size)
+        
+        if self.show_walls and len(screen_points) >= 2:
+            screen_points.sort(key=lambda p: p[3])
+            
+            for j in range(1, len(screen_points)):
+                sx1, sy1, age1, idx1, d1 = screen_points[j - 1]
+                sx2, sy2, age2, idx2, d2 = screen_points[j]
+                
+                angle_gap = idx2 - idx1
+                if angle_gap > 10:
+                    continue
+                
+                pixel_dist = math.sqrt((sx2 - sx1)**2 + (sy2 - sy1)**2)
+                
+                max_pixel_gap = max(30, 150 * self.zoom)
+                
+                if pixel_dist < max_pixel_gap:
+                    max_age = max(age1, age2)
+                    if max_age == 0:
+                        wc = (0, 255, 100)
+                    elif max_age == 1:
+                        wc = (0, 180, 70)
+                    else:
+                        wc = (0, 120, 50)
+                    
+                    pygame.draw.line(self.screen, wc, (sx1, sy1), (sx2, sy2), 2)
+        
+        if self.show_objects:
+            self._draw_objects()
+    
+    def _draw_objects(self):
+        for obj in self.tracker.objects:
+            x1, y1 = self._world_to_screen(*obj.bbox_min)
+            x2, y2 = self._world_to_screen(*obj.bbox_max)
+            rect = pygame.Rect(min(x1, x2) - 3, min(y1, y2) - 3, abs(x2 - x1) + 6, abs(y2 - y1) + 6)
+            color = OBJECT_COLOR if obj.missed == 0 else (120, 90, 20)
+            pygame.draw.rect(self.screen, color, rect, 1)
+            
+            cx, cy = self._world_to_screen(*obj.centroid)
+            vx, vy = obj.velocity
+            ex, ey = self._world_to_screen(obj.centroid[0] + vx, obj.centroid[1] + vy)
+            if obj.speed > 50:
+                pygame.draw.line(self.screen, color, (cx, cy), (ex, ey), 2)
+            
+            label = self.font_small.render(f"#{obj.id} {obj.speed / 1000:.1f}m/s", True, color)
+            self.screen.blit(label, (rect.right + 2, rect.top - 2))
+    
+    def _draw_zones(self):
+        if not self.show_zones or not self.zones.zones:
+            return
+        overlay = None
+        for k, (rings, anchor) in enumerate(self._zone_shapes):
+            active = self.zones.active[k]
+            if active:
+                color = ZONE_ALERT_COLOR
+            elif self.zones.points[k] >= self.zones.min_points:
+                color = ZONE_HIT_COLOR
+            else:
+                color = ZONE_COLOR
+            
+            for ring in rings:
+                pts = [self._world_to_screen(x, y) for x, y in ring]
+                if active and len(rings) == 1:
+                    if overlay is None:
+                        overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+                    pygame.draw.polygon(overlay, ZONE_ALERT_COLOR + (50,), pts)
+                pygame.draw.polygon(self.screen, color, pts, 2 if active else 1)
+            
+            name = self.zones.zones[k].name
+            label = self.font_small.render(f"{name} ({self.zones.points[k]})" if active else name,
+                                           True, color)
+            self.screen.blit(label, self._world_to_screen(*anchor))
+        if overlay is not None:
+            self.screen.blit(overlay, (0, 0))
+    
+    def _draw_sweep_line(self):
+        if not self.connected:
+            return
+        cx, cy = self.width // 2, self.height // 2
+        rad = math.radians(self.scans.last_angle)
+        max_r = int(self.max_range_m * 1000 * self.zoom)
+        ex = cx + int(max_r * math.cos(rad))
+        ey = cy - int(max_r * math.sin(rad))
+        pygame.draw.line(self.screen, (0, 80, 40), (cx, cy), (ex, ey), 1)
+    
+    def _draw_hud(self):
+        pygame.draw.rect(self.screen, (20, 20, 28), (0, 0, self.width, 36))
+        pygame.draw.line(self.screen, (40, 40, 50), (0, 36), (self.width, 36), 1)
+        
+        title = self.font_big.render("● LiDAR Map", True, (0, 255, 100))
+        self.screen.blit(title, (12, 8))
+        
+        port_short = self.port_name.split("/")[-1] if "/" in self.port_name else self.port_name
+        if self.connected:
+            status_color = STATUS_GOOD
+            status_text = f"Connected: {port_short}"
+            
+            pts = self.scans.point_count()
+            pps = self.lidar.points_per_sec
+            pkts = self.lidar.packet_count
+            stats = f"  │  {pts} pts  │  {pps} pts/s  │  {pkts} pkts  │  Scan #{self.scans.scan_count}"
+            stats += f" ({self.scans.assembler.rotation_hz:.1f} Hz)"
+            stats += f"  │  {len(self.tracker.objects)} obj ({self.tracker.last_ms:.1f} ms)"
+            if self.zones.zones:
+                stats += f"  │  {int(self.zones.active.sum())}/{len(self.zones.zones)} zones ({self.zones.last_ms:.1f} ms)"
+            if self.lidar.reconnects:
+                stats += f"  │  {self.lidar.reconnects} reconnects, down {self.lidar.downtime():.1f}s"
+            status_text += stats
+        elif self.lidar.connections:
+            status_color = STATUS_WARN
+            status_text = f"Disconnected: {port_short} - rescanning{self._retry_hint()}  │  down {self.lidar.outage():.1f}s"
+        else:
+            status_color = STATUS_BAD
+            status_text = f"No LiDAR detected - check USB connection{self._retry_hint()}"
+        
+        status = self.font.render(status_text, True, status_color)
+        self.screen.blit(status, (160, 10))
+        
+        self._draw_last_event()
+        self._draw_last_zone_event()
+        
+        help_y = self.height - 24
+        pygame.draw.rect(self.screen, (20, 20, 28), (0, help_y - 4, self.width, 28))
+        mode_hint = "  │  3 → 3D View  │  H 3D History" if self.has_opengl else ""
+        help_text = f"Range: {self.max_range_m}m  │  +/- Zoom  │  W Walls: {'ON' if self.show_walls else 'OFF'}  │  O Objects: {'ON' if self.show_objects else 'OFF'}  │  Z Zones  │  G Grid  │  R Reset  │  F Fullscreen{mode_hint}  │  ESC Quit"
+        help_surf = self.font_small.render(help_text, True, (100, 100, 120))
+        self.screen.blit(help_surf, (12, help_y))
+    
+    def _retry_hint(self):
+        if self.lidar.state != "backoff":
+            return ""
+        return f" (retry in {max(0.0, self.lidar.next_retry - time.time()):.1f}s)"
+    
+    def _draw_last_event(self):
+        if not self.lidar.events:
+            return
+        event = self.lidar.events[-1]
+        if time.time() - event.stamp > EVENT_SHOW_SECONDS:
+            return
+        colors = {"connected": STATUS_GOOD, "disconnected": STATUS_WARN}
+        text = f"{time.strftime('%H:%M:%S', time.localtime(event.stamp))}  {event.kind}: {event.port}"
+        if event.detail:
+            text += f" ({event.detail})"
+        surf = self.font_small.render(text, True, colors.get(event.kind, STATUS_BAD))
+        self.screen.blit(surf, (12, 42))
+    
+    def _draw_last_zone_event(self):
+        if not self.zones.events:
+            return
+        event = self.zones.events[-1]
+        if time.time() - event.stamp > EVENT_SHOW_SECONDS:
+            return
+        text = (f"{time.strftime('%H:%M:%S', time.localtime(event.stamp))}  zone {event.kind}: "
+                f"{event.zone} (scan #{event.scan}, {event.latency * 1000:.0f} ms)")
+        color = ZONE_ALERT_COLOR if event.kind == "enter" else STATUS_GOOD
+        surf = self.font_small.render(text, True, color)
+        self.screen.blit(surf, (12, 58))
+    
+    def _draw_legend(self):
+        lx = self.width - 170
+        ly = 46
+        lw = 160
+        lh = 181
+        
+        legend_bg = pygame.Surface((lw, lh), pygame.SRCALPHA)
+        legend_bg.fill((20, 20, 28, 200))
+        self.screen.blit(legend_bg, (lx, ly))
+        pygame.draw.rect(self.screen, (40, 40, 50), (lx, ly, lw, lh), 1)
+        
+        header = self.font_small.render("LEGEND", True, (150, 150, 160))
+        self.screen.blit(header, (lx + 8, ly + 6))
+        
+        items = [
+            (POINT_COLOR_FRESH, "Fresh point"),
+            ((0, 220, 80), "1-scan old"),
+            (POINT_COLOR_OLD, "2-3 scans old"),
+            (WALL_COLOR[:3], "Wall segment"),
+            (OBJECT_COLOR, "Tracked object"),
+            (ZONE_COLOR, "Zone"),
+            (ZONE_ALERT_COLOR, "Zone intrusion"),
+            (CENTER_COLOR, "LiDAR origin"),
+            ((0, 80, 40), "Sweep line"),
+        ]
+        
+        for i, (color, label) in enumerate(items):
+            y = ly + 24 + i * 17
+            pygame.draw.circle(self.screen, color, (lx + 16, y + 5), 4)
+            text = self.font_small.render(label, True, (140, 140, 150))
+            self.screen.blit(text, (lx + 28, y - 2))
+    
+    def _switch_to_3d(self):
+        if not self._load_3d_view():
+            return
+        self.mode_3d = True
+        flags = DOUBLEBUF | OPENGL
+        if self.fullscreen:
+            flags |= FULLSCREEN
+        self.screen = pygame.display.set_mode((self.width, self.height), flags)
+        self.view_3d.init_gl(self.width, self.height)
+        self._set_3d_caption()
+
+    def _set_3d_caption(self):
+        if self.show_history:
+            pygame.display.set_caption(f"MB-1R2T LiDAR Map [3D, last {self.history.scans} scans]")
+        else:
+            pygame.display.set_caption("MB-1R2T LiDAR Map [3D]")
+
+    def _switch_to_2d(self):
+        self.mode_3d = False
+        if self.view_3d:
+            self.view_3d.release_gl()
+        flags = RESIZABLE
+        if self.fullscreen:
+            flags = FULLSCREEN
+        self.screen = pygame.display.set_mode((self.width, self.height), flags)
+        self._update_zoom()
+        pygame.display.set_caption("MB-1R2T LiDAR Map")
+
+    def run(self):
+        running = True
+        self._update_zoom()
+        
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                
+                elif event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_ESCAPE, pygame.K_q):
+                        running = False
+                    elif event.key == pygame.K_3 and self.has_opengl and not self.mode_3d:
+                        self._switch_to_3d()
+                    elif event.key == pygame.K_2 and self.mode_3d:
+                        self._switch_to_2d()
+                    elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
+                        self.max_range_m = max(1, self.max_range_m - 1)
+                        self._update_zoom()
+                    elif event.key == pygame.K_MINUS:
+                        self.max_range_m = min(20, self.max_range_m + 1)
+                        self._update_zoom()
+                    elif event.key == pygame.K_w:
+                        self.show_walls = not self.show_walls
+                    elif event.key == pygame.K_o:
+                        self.show_objects = not self.show_objects
+                    elif event.key == pygame.K_z:
+                        self.show_zones = not self.show_zones
+                    elif event.key == pygame.K_h:
+                        self.show_history = not self.show_history
+                        if self.mode_3d:
+                            self._set_3d_caption()
+                    elif event.key == pygame.K_g:
+                        self.show_grid = not self.show_grid
+                    elif event.key == pygame.K_r:
+                        self.scans.reset()
+                        self._scans_seen = 0
+                        self.tracker.reset()
+                        if self.history:
+                            self.history.reset()
+                        self.zones.reset()
+                        if self.mode_3d and self.view_3d:
+                            self.view_3d.cam_dist = 8000.0
+                            self.view_3d.cam_pitch = 35.0
+                            self.view_3d.cam_yaw = 45.0
+                            self.view_3d.cam_target = [0.0, 0.0, 0.0]
+                    elif event.key == pygame.K_f:
+                        self.fullscreen = not self.fullscreen
+                        if self.fullscreen:
+                            flags = FULLSCREEN
+                            if self.mode_3d:
+                                flags |= DOUBLEBUF | OPENGL
+                            self.screen = pygame.display.set_mode((0, 0), flags)
+                            info = pygame.display.Info()
+                            self.width = info.current_w
+                            self.height = info.current_h
+                        else:
+                            self.width, self.height = 1200, 900
+                            flags = RESIZABLE
+                            if self.mode_3d:
+                                flags = DOUBLEBUF | OPENGL
+                            self.screen = pygame.display.set_mode(
+                                (self.width, self.height), flags)
+                        self._update_zoom()
+                        if self.mode_3d and self.view_3d:
+                            self.view_3d.init_gl(self.width, self.height)
+                
+                elif event.type == pygame.VIDEORESIZE:
+                    self.width, self.height = event.w, event.h
+                    self._update_zoom()
+                    if self.mode_3d and self.view_3d:
+                        self.view_3d._setup_projection()
+                
+                if self.mode_3d and self.view_3d:
+                    self.view_3d.handle_event(event)
+            
+            self._process_data()
+            
+            if self.mode_3d and self.view_3d:
+                objects = self.tracker.objects if self.show_objects else ()
+                self.view_3d.render(self.scans.data, self.max_range_m, self.show_walls, objects,
+                                    self.show_history)
+                pygame.display.flip()
+            else:
+                self.screen.fill(BG_COLOR)
+                self._draw_grid()
+                self._draw_zones()
+                self._draw_sweep_line()
+                self._draw_scan()
+                self._draw_hud()
+                self._draw_legend()
+                pygame.display.flip()
+            
+            self.clock.tick(60)
+        
+        if self.mode_3d and self.view_3d:
+            self.view_3d.release_gl()
+        self.lidar.close()
+        pygame.quit()
+
@@ -0,0 +1,177 @@
+import time
+import threading
+from collections import deque, namedtuple
+import serial
+
+from lidar_core import find_lidar_port, LidarSerial, PacketDecoder
+
+READ_TIMEOUT = 0.1
+STALL_TIMEOUT = 2.0
+BACKOFF_MIN = 0.25
+BACKOFF_MAX = 5.0
+MAX_PENDING_BATCHES = 2000
+MAX_EVENTS = 50
+
+ConnectionEvent = namedtuple("ConnectionEvent", ["stamp", "kind", "port", "detail"])
+
+
+class ConnectionSupervisor:
+    # Owns the serial port on a background thread: finds and opens the port,
+    # reads and decodes packets, and on an error or a stalled stream closes
+    # the port and rescans with exponential backoff. The render thread only
+    # drains already-decoded packet batches through read_batches(), so
+    # enumeration and open never block a frame. The decoder is shared across
+    # connections, so packet counters survive reconnects. A disconnect queues
+    # a (None, stamp) entry so consumers can break the rotation in progress.
+    def __init__(self, port=None, find_port=find_lidar_port):
+        self.fixed_port = port
+        self._find_port = find_port
+        self.decoder = PacketDecoder()
+        self.lidar = None
+        self.port_name = port or ""
+        self.connected = False
+        self.state = "searching"
+        self.next_retry = 0.0
+        self.connections = 0
+        self.reconnects = 0
+        self.total_downtime = 0.0
+        self.down_since = time.time()
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.event_count = 0
+        self._last_open_error = None
+        self._pending = deque(maxlen=MAX_PENDING_BATCHES)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lidar-supervisor", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2 * READ_TIMEOUT + 1.0)
+        if self.lidar:
+            self.lidar.close()
+
+    @property
+    def packet_count(self):
+        return self.decoder.packet_count
+
+    @property
+    def points_per_sec(self):
+        lidar = self.lidar
+        return lidar.points_per_sec if lidar and self.connected else 0
+
+    def downtime(self):
+        if self.connected:
+            return self.total_downtime
+        return self.total_downtime + (time.time() - self.down_since)
+
+    def outage(self):
+        return 0.0 if self.connected else time.time() - self.down_since
+
+    def events_since(self, seen):
+        with self._lock:
+            events = list(self.events)
+            count = self.event_count
+        new = min(count - seen, len(events))
+        return (events[len(events) - new:] if new > 0 else []), count
+
+    def read_batches(self):
+        with self._lock:
+            batches = list(self._pending)
+            self._pending.clear()
+        return batches
+
+    def _event(self, kind, port, detail=""):
+        with self._lock:
+            self.events.append(ConnectionEvent(time.time(), kind, port, detail))
+            self.event_count += 1
+
+    def _backoff(self, delay):
+        self.state = "backoff"
+        self.next_retry = time.time() + delay
+        self._stop.wait(delay)
+        return min(delay * 2, BACKOFF_MAX)
+
+    def _run(self):
+        # Backoff only resets once a connection actually delivers data, so a
+        # port that opens but stays silent, or whose reads fail, is retried
+        # less and less often instead of spinning. Anything unexpected is
+        # recorded as an "error" event and retried, so the thread never dies
+        # silently behind a stale HUD.
+        backoff = BACKOFF_MIN
+        while not self._stop.is_set():
+            try:
+                backoff = self._step(backoff)
+            except Exception as e:
+                self._event("error", self.port_name, f"{type(e).__name__}: {e}")
+                if self.lidar is not None:
+                    self._disconnect("error")
+                backoff = self._backoff(backoff)
+
+    def _step(self, backoff):
+        if self.lidar is None:
+            if not self._connect():
+                return self._backoff(backoff)
+            self._last_data = time.time()
+            self._last_bytes = self.decoder.byte_count
+
+        try:
+            batch, stamp = self.lidar.read_batch()
+        except (serial.SerialException, OSError) as e:
+            self._disconnect(f"read failed: {e}")
+            return self._backoff(backoff)
+
+        if len(batch.count):
+            with self._lock:
+                self._pending.append((batch, stamp))
+
+        now = time.time()
+        if self.decoder.byte_count != self._last_bytes:
+            self._last_bytes = self.decoder.byte_count
+            self._last_data = now
+            return BACKOFF_MIN
+        if now - self._last_data > STALL_TIMEOUT:
+            self._disconnect(f"no data for {STALL_TIMEOUT:.1f} s")
+            return self._backoff(backoff)
+        return backoff
+
+    def _connect(self):
+        self.state = "searching"
+        port = self.fixed_port or self._find_port()
+        if not port:
+            return False
+        try:
+            lidar = LidarSerial(port, READ_TIMEOUT, self.decoder)
+        except Exception as e:
+            if (port, str(e)) != self._last_open_error:
+                self._event("open_failed", port, str(e))
+            self._last_open_error = (port, str(e))
+            return False
+        self._last_open_error = None
+
+        self.decoder.resync()
+        now = time.time()
+        outage = now - self.down_since
+        if self.connections:
+            self.total_downtime += outage
+            self.reconnects += 1
+        self.connections += 1
+        self.lidar = lidar
+        self.port_name = port
+        self.connected = True
+        self.state = "connected"
+        self._event("connected", port, f"after {outage:.1f} s" if self.connections > 1 else "")
+        return True
+
+    def _disconnect(self, reason):
+        self.lidar.close()
+        self.lidar = None
+        self.connected = False
+        self.state = "searching"
+        self.down_since = time.time()
+        with self._lock:
+            self._pending.append((None, self.down_since))
+        self._event("disconnected", self.port_name, reason)
@@ -0,0 +1,200 @@
+import time
+import numpy as np
+
+CLUSTER_EPS = 150.0
+CLUSTER_MIN_POINTS = 3
+MAX_OBJECT_SIZE = 1500.0
+TRACK_GATE = 600.0
+TRACK_MAX_MISSED = 3
+VELOCITY_SMOOTHING = 0.5
+
+_NEIGHBOUR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def _neighbour_pairs(xy, eps):
+    # Hash every point into an eps-sized grid cell; candidate neighbours are
+    # the points in the 3x3 block of cells around it, found by binary search
+    # over the sorted cell keys.
+    n = len(xy)
+    cells = np.floor(xy / eps).astype(np.int64)
+    cells -= cells.min(axis=0)
+    width = int(cells[:, 1].max()) + 3
+    keys = (cells[:, 0] + 1) * width + (cells[:, 1] + 1)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    src_parts = []
+    dst_parts = []
+    for dx, dy in _NEIGHBOUR_OFFSETS:
+        target = keys + dx * width + dy
+        lo = np.searchsorted(sorted_keys, target, "left")
+        hi = np.searchsorted(sorted_keys, target, "right")
+        count = hi - lo
+        total = int(count.sum())
+        if not total:
+            continue
+        first = np.cumsum(count) - count
+        pos = np.arange(total) - np.repeat(first, count) + np.repeat(lo, count)
+        src_parts.append(np.repeat(np.arange(n), count))
+        dst_parts.append(order[pos])
+
+    src = np.concatenate(src_parts)
+    dst = np.concatenate(dst_parts)
+    diff = xy[src] - xy[dst]
+    close = np.einsum("ij,ij->i", diff, diff) <= eps * eps
+    return src[close], dst[close]
+
+
+def cluster_points(xy, eps=CLUSTER_EPS, min_points=CLUSTER_MIN_POINTS):
+    n = len(xy)
+    labels = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return labels
+
+    src, dst = _neighbour_pairs(xy, eps)
+    core = np.bincount(src, minlength=n) >= min_points
+
+    edge = core[src] & core[dst]
+    a = src[edge]
+    b = dst[edge]
+    comp = np.arange(n)
+    while True:
+        prev = comp
+        comp = comp.copy()
+        np.minimum.at(comp, a, comp[b])
+        comp = comp[comp]
+        if np.array_equal(comp, prev):
+            break
+
+    labels[core] = comp[core]
+    border = ~core[src] & core[dst]
+    if border.any():
+        attach = np.full(n, n, dtype=np.int64)
+        np.minimum.at(attach, src[border], comp[dst[border]])
+        has_core = attach < n
+        labels[has_core & ~core] = attach[has_core & ~core]
+
+    clustered = labels >= 0
+    labels[clustered] = np.unique(labels[clustered], return_inverse=True)[1]
+    return labels
+
+
+def summarize_clusters(xy, labels):
+    k = int(labels.max()) + 1 if len(labels) else 0
+    if k == 0:
+        empty = np.zeros((0, 2))
+        return empty, empty, empty, np.zeros(0, dtype=np.int64)
+    sel = labels >= 0
+    lab = labels[sel]
+    pts = xy[sel]
+    counts = np.bincount(lab, minlength=k)
+    centroids = np.column_stack((np.bincount(lab, pts[:, 0], k),
+                                 np.bincount(lab, pts[:, 1], k))) / counts[:, None]
+    mins = np.full((k, 2), np.inf)
+    maxs = np.full((k, 2), -np.inf)
+    np.minimum.at(mins, lab, pts)
+    np.maximum.at(maxs, lab, pts)
+    return centroids, mins, maxs, counts
+
+
+class TrackedObject:
+    def __init__(self, track_id, centroid, bbox_min, bbox_max, points, stamp):
+        self.id = track_id
+        self.centroid = centroid
+        self.velocity = np.zeros(2)
+        self.bbox_min = bbox_min
+        self.bbox_max = bbox_max
+        self.points = points
+        self.hits = 1
+        self.missed = 0
+        self.last_seen = stamp
+
+    @property
+    def speed(self):
+        return float(np.hypot(*self.velocity))
+
+    @property
+    def extent(self):
+        return self.bbox_max - self.bbox_min
+
+
+class ObjectTracker:
+    def __init__(self, eps=CLUSTER_EPS, min_points=CLUSTER_MIN_POINTS,
+                 max_size=MAX_OBJECT_SIZE, gate=TRACK_GATE, max_missed=TRACK_MAX_MISSED):
+        self.eps = eps
+        self.min_points = min_points
+        self.max_size = max_size
+        self.gate = gate
+        self.max_missed = max_missed
+        self.reset()
+
+    def reset(self):
+        self.objects = []
+        self.next_id = 1
+        self.updates = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+
+    def update(self, xy, stamp=None):
+        t0 = time.perf_counter()
+        stamp = time.time() if stamp is None else stamp
+
+        labels = cluster_points(xy, self.eps, self.min_points)
+        centroids, mins, maxs, counts = summarize_clusters(xy, labels)
+        size = np.hypot(*(maxs - mins).T) if len(counts) else np.zeros(0)
+        keep = size <= self.max_size
+        centroids, mins, maxs, counts = centroids[keep], mins[keep], maxs[keep], counts[keep]
+
+        self._associate(centroids, mins, maxs, counts, stamp)
+
+        self.last_ms = (time.perf_counter() - t0) * 1000.0
+        self.updates += 1
+        self.avg_ms += (self.last_ms - self.avg_ms) / min(self.updates, 50)
+        self.max_ms = max(self.max_ms, self.last_ms)
+        return self.objects
+
+    def _associate(self, centroids, mins, maxs, counts, stamp):
+        tracks = self.objects
+        matched_tracks = set()
+        matched_clusters = set()
+
+        if tracks and len(centroids):
+            predicted = np.array([t.centroid + t.velocity * (stamp - t.last_seen) for t in tracks])
+            dist = np.linalg.norm(predicted[:, None, :] - centroids[None, :, :], axis=2)
+            ti, ci = np.nonzero(dist <= self.gate)
+            for k in np.argsort(dist[ti, ci], kind="stable"):
+                t, c = int(ti[k]), int(ci[k])
+                if t in matched_tracks or c in matched_clusters:
+                    continue
+                matched_tracks.add(t)
+                matched_clusters.add(c)
+                obj = tracks[t]
+                gap = stamp - obj.last_seen
+                if gap > 0:
+                    v = (centroids[c] - obj.centroid) / gap
+                    obj.velocity += (v - obj.velocity) * VELOCITY_SMOOTHING
+                obj.centroid = centroids[c]
+                obj.bbox_min = mins[c]
+                obj.bbox_max = maxs[c]
+                obj.points = int(counts[c])
+                obj.hits += 1
+                obj.missed = 0
+                obj.last_seen = stamp
+
+        alive = []
+        for t, obj in enumerate(tracks):
+            if t not in matched_tracks:
+                obj.missed += 1
+                if obj.missed > self.max_missed:
+                    continue
+            alive.append(obj)
+
+        for c in range(len(centroids)):
+            if c in matched_clusters:
+                continue
+            alive.append(TrackedObject(self.next_id, centroids[c], mins[c], maxs[c],
+                                       int(counts[c]), stamp))
+            self.next_id += 1
+
+        self.objects = alive
@@ -0,0 +1,248 @@
+import json
+import time
+from collections import deque, namedtuple
+import numpy as np
+
+from lidar_core import SCAN_SIZE, MAX_DISTANCE
+
+ZONE_RANGE_STEP = 20
+ZONE_RANGE_BINS = MAX_DISTANCE // ZONE_RANGE_STEP
+MAX_ZONES = 64
+ZONE_MIN_POINTS = 2
+ZONE_ENTER_SCANS = 2
+ZONE_EXIT_SCANS = 3
+MAX_ZONE_EVENTS = 100
+OUTLINE_STEP_DEG = 2.0
+
+ZoneEvent = namedtuple("ZoneEvent", ["stamp", "kind", "zone", "scan", "points", "latency"])
+
+
+def _arc(radius, start_deg, span_deg):
+    steps = max(2, int(np.ceil(span_deg / OUTLINE_STEP_DEG)) + 1)
+    rad = np.radians(start_deg + np.linspace(0.0, span_deg, steps))
+    return np.column_stack((radius * np.cos(rad), radius * np.sin(rad)))
+
+
+# Zones provide contains(angle_deg, distance_mm), evaluated once on the
+# centre of every (0.5 deg angle bin, ZONE_RANGE_STEP mm) lattice cell with
+# angles as a column and distances as a row, plus outline() and anchor() for
+# drawing. Coordinates match Scan.xy: x = d*cos(angle), y = d*sin(angle), mm.
+
+
+class SectorZone:
+    # Counter-clockwise wedge from start_deg to end_deg between min_mm and
+    # max_mm; 350 -> 10 wraps through 0 deg.
+    def __init__(self, name, start_deg, end_deg, max_mm, min_mm=0.0):
+        self.name = name
+        if not 0 <= min_mm < max_mm:
+            raise ValueError(f"zone {name!r}: need 0 <= min_mm < max_mm")
+        self.start_deg = start_deg % 360.0
+        self.span_deg = (end_deg - start_deg) % 360.0 or 360.0
+        self.min_mm = min_mm
+        self.max_mm = max_mm
+
+    def contains(self, angle_deg, distance_mm):
+        inside = (distance_mm >= self.min_mm) & (distance_mm <= self.max_mm)
+        if self.span_deg < 360.0:
+            inside = inside & ((angle_deg - self.start_deg) % 360.0 <= self.span_deg)
+        return inside
+
+    def outline(self):
+        outer = _arc(self.max_mm, self.start_deg, self.span_deg)
+        if self.span_deg >= 360.0:
+            rings = [outer]
+            if self.min_mm > 0:
+                rings.append(_arc(self.min_mm, self.start_deg, self.span_deg))
+            return rings
+        if self.min_mm > 0:
+            inner = _arc(self.min_mm, self.start_deg, self.span_deg)[::-1]
+        else:
+            inner = np.zeros((1, 2))
+        return [np.concatenate((outer, inner))]
+
+    def anchor(self):
+        rad = np.radians(self.start_deg + self.span_deg / 2.0)
+        r = self.max_mm if self.span_deg >= 360.0 else (self.min_mm + self.max_mm) / 2.0
+        return r * np.cos(rad), r * np.sin(rad)
+
+
+class BandZone(SectorZone):
+    # Full-circle distance band, e.g. "anything closer than 500 mm".
+    def __init__(self, name, min_mm, max_mm):
+        super().__init__(name, 0.0, 360.0, max_mm, min_mm)
+
+
+class PolygonZone:
+    # Arbitrary simple polygon (convex or not) in sensor coordinates.
+    def __init__(self, name, points):
+        self.name = name
+        self.points = np.asarray(points, dtype=np.float64)
+        if self.points.ndim != 2 or self.points.shape[1] != 2 or len(self.points) < 3:
+            raise ValueError(f"zone {name!r}: polygon needs at least 3 [x, y] points")
+
+    def contains(self, angle_deg, distance_mm):
+        # Even-odd rule, one vectorized pass per edge.
+        rad = np.radians(angle_deg)
+        x = distance_mm * np.cos(rad)
+        y = distance_mm * np.sin(rad)
+        inside = np.zeros(np.broadcast(x, y).shape, dtype=bool)
+        x1, y1 = self.points.T
+        x2, y2 = np.roll(self.points, -1, axis=0).T
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            if ay == by:
+                continue
+            crosses = (ay > y) != (by > y)
+            xc = ax + (y - ay) * (bx - ax) / (by - ay)
+            inside ^= crosses & (x < xc)
+        return inside
+
+    def outline(self):
+        return [self.points]
+
+    def anchor(self):
+        return tuple(self.points.mean(axis=0))
+
+
+ZONE_TYPES = {
+    "sector": lambda d: SectorZone(str(d["name"]), float(d["start_deg"]), float(d["end_deg"]),
+                                   float(d["max_mm"]), float(d.get("min_mm", 0.0))),
+    "band": lambda d: BandZone(str(d["name"]), float(d.get("min_mm", 0.0)), float(d["max_mm"])),
+    "polygon": lambda d: PolygonZone(str(d["name"]), d["points"]),
+}
+
+
+def zones_from_config(config):
+    if not isinstance(config, list):
+        raise ValueError("expected a list of zones or an object with a \"zones\" list")
+    if len(config) > MAX_ZONES:
+        raise ValueError(f"at most {MAX_ZONES} zones are supported, got {len(config)}")
+    zones = []
+    for i, d in enumerate(config):
+        if not isinstance(d, dict):
+            raise ValueError(f"zone #{i + 1}: expected an object, got {type(d).__name__}")
+        kind = d.get("type")
+        if kind not in ZONE_TYPES:
+            raise ValueError(f"zone #{i + 1}: unknown type {kind!r} "
+                             f"(expected one of {', '.join(ZONE_TYPES)})")
+        try:
+            zones.append(ZONE_TYPES[kind](d))
+        except KeyError as e:
+            raise ValueError(f"zone #{i + 1} ({kind}): missing field {e}") from None
+        except (TypeError, AttributeError, ValueError) as e:
+            raise ValueError(f"zone #{i + 1} ({kind}): {e}") from None
+    return zones
+
+
+def load_zones(path):
+    with open(path) as f:
+        config = json.load(f)
+    if isinstance(config, dict):
+        config = config.get("zones")
+    return zones_from_config(config)
+
+
+def compile_zones(zones):
+    # One uint64 per (angle bin, range bin) cell with bit k set when the cell
+    # centre lies in zone k. The extra last range column stays empty and
+    # catches points beyond MAX_DISTANCE.
+    if len(zones) > MAX_ZONES:
+        raise ValueError(f"at most {MAX_ZONES} zones are supported, got {len(zones)}")
+    angle = ((np.arange(SCAN_SIZE) + 0.5) * (360.0 / SCAN_SIZE))[:, None]
+    distance = ((np.arange(ZONE_RANGE_BINS) + 0.5) * ZONE_RANGE_STEP)[None, :]
+    lattice = np.zeros((SCAN_SIZE, ZONE_RANGE_BINS + 1), dtype=np.uint64)
+    for k, zone in enumerate(zones):
+        mask = zone.contains(angle, distance)
+        lattice[:, :ZONE_RANGE_BINS] |= mask.astype(np.uint64) << np.uint64(k)
+    return lattice
+
+
+class ZoneMonitor:
+    # Checks every completed Scan against all zones with a single lattice
+    # lookup per point; the per-zone reduction always works on MAX_ZONES bit
+    # columns, so the cost does not grow with the number of zones. A zone
+    # enters after `enter_scans` consecutive rotations with at least
+    # `min_points` hits and exits after `exit_scans` clear rotations.
+    # Latency runs from the arrival of the first packet that showed the new
+    # state to the moment the event is emitted.
+    def __init__(self, zones=(), min_points=ZONE_MIN_POINTS,
+                 enter_scans=ZONE_ENTER_SCANS, exit_scans=ZONE_EXIT_SCANS):
+        self.zones = list(zones)
+        self.lattice = compile_zones(self.zones)
+        self.min_points = min_points
+        self.enter_scans = enter_scans
+        self.exit_scans = exit_scans
+        self.listeners = []
+        self.reset()
+
+    def reset(self):
+        n = len(self.zones)
+        self.points = np.zeros(n, dtype=np.int64)
+        self.active = np.zeros(n, dtype=bool)
+        self._hit_run = np.zeros(n, dtype=np.int64)
+        self._clear_run = np.zeros(n, dtype=np.int64)
+        self._since = np.zeros(n)
+        self.events = deque(maxlen=MAX_ZONE_EVENTS)
+        self.event_count = 0
+        self.updates = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+        return callback
+
+    def events_since(self, seen):
+        new = min(self.event_count - seen, len(self.events))
+        events = list(self.events)
+        return (events[len(events) - new:] if new > 0 else []), self.event_count
+
+    def hits(self, scan):
+        # Returns per-zone hit counts and the earliest packet arrival among
+        # each zone's hits (inf for zones without hits).
+        n = len(self.zones)
+        bins = (scan.angle * 2).astype(np.int64) % SCAN_SIZE
+        ranges = np.minimum(scan.distance // ZONE_RANGE_STEP, ZONE_RANGE_BINS)
+        bits = self.lattice[bins, ranges]
+        inside = np.flatnonzero(bits)
+        if not len(inside):
+            return np.zeros(n, dtype=np.int64), np.full(n, np.inf)
+        flags = np.unpackbits(bits[inside].astype("<u8").view(np.uint8).reshape(-1, 8),
+                              axis=1, bitorder="little")[:, :n].astype(bool)
+        counts = flags.sum(axis=0)
+        first = np.where(flags, scan.stamp[inside][:, None], np.inf).min(axis=0)
+        return counts, first
+
+    def update(self, scan):
+        t0 = time.perf_counter()
+        counts, first = self.hits(scan)
+        hit = counts >= self.min_points
+
+        self._hit_run = np.where(hit, self._hit_run + 1, 0)
+        self._clear_run = np.where(hit, 0, self._clear_run + 1)
+        onset = hit & (self._hit_run == 1) & ~self.active
+        cleared = ~hit & (self._clear_run == 1) & self.active
+        self._since[onset] = first[onset]
+        self._since[cleared] = scan.end_time
+        entered = ~self.active & (self._hit_run >= self.enter_scans)
+        exited = self.active & (self._clear_run >= self.exit_scans)
+        self.active ^= entered | exited
+        self.points = counts
+
+        events = []
+        now = time.time()
+        for k in np.flatnonzero(entered | exited).tolist():
+            events.append(ZoneEvent(now, "enter" if entered[k] else "exit", self.zones[k].name,
+                                    scan.index, int(counts[k]), now - float(self._since[k])))
+
+        self.last_ms = (time.perf_counter() - t0) * 1000.0
+        self.updates += 1
+        self.avg_ms += (self.last_ms - self.avg_ms) / min(self.updates, 50)
+        self.max_ms = max(self.max_ms, self.last_ms)
+
+        for event in events:
+            self.events.append(event)
+            self.event_count += 1
+            for callback in self.listeners:
+                callback(event)
+        return events
@@ -0,0 +1,196 @@
+import numpy as np
+import pytest
+
+from bench_startup import make_packet, synth_stream
+from lidar_core import (PacketDecoder, ScanAssembler, ScanRing, measure_first_scan,
+                        split_packets, valid_mask)
+
+PACKETS = 36
+SAMPLES = 20
+
+
+def packets(rotations, first=0, offset_cdeg=0, span_cdeg=900, samples=10):
+    # One packet every 10 deg; with offset 500 and span 900 the last packet of
+    # each rotation runs from 355 to 364 deg and straddles 0.
+    out = []
+    for k in range(first, first + rotations * PACKETS):
+        start = offset_cdeg + (k % PACKETS) * 1000
+        out.append(make_packet(start, start + span_cdeg,
+                               [(200, 1000 + k % 100) for _ in range(samples)]))
+    return out
+
+
+def feed_all(decoder, data, chunk):
+    parts = [decoder.feed(data[i:i + chunk]) for i in range(0, len(data), chunk)]
+    return (np.concatenate([p.start_cdeg for p in parts]),
+            np.concatenate([p.angle for p in parts]),
+            np.concatenate([p.distance for p in parts]))
+
+
+def with_garbage(data, seed=1, count=200):
+    rng = np.random.default_rng(seed)
+    data = bytearray(data)
+    for _ in range(count):
+        i = int(rng.integers(len(data)))
+        data[i:i] = bytes(rng.choice([0xAA, 0x55, 0x00, 0x07, 0xC8], int(rng.integers(1, 6))))
+    return bytes(data)
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 333, 1 << 20])
+def test_decoder_is_independent_of_chunking(chunk):
+    data = with_garbage(synth_stream(4))
+    ref = PacketDecoder()
+    expected = feed_all(ref, data, len(data))
+    dec = PacketDecoder()
+    got = feed_all(dec, data, chunk)
+    for a, b in zip(expected, got):
+        np.testing.assert_array_equal(a, b)
+    assert dec.packet_count == ref.packet_count
+    assert dec.garbage_bytes == ref.garbage_bytes
+    assert len(dec._carry) <= 1
+
+
+def test_decoder_clean_stream_has_no_garbage():
+    dec = PacketDecoder()
+    batch = dec.feed(synth_stream(3))
+    assert dec.packet_count == 3 * PACKETS
+    assert len(batch.angle) == 3 * PACKETS * SAMPLES
+    assert dec.garbage_bytes == 0
+    assert valid_mask(batch).all()
+
+
+def test_decoder_resync_drops_half_packet():
+    pkt = synth_stream(1)[:50]
+    dec = PacketDecoder()
+    dec.feed(pkt)
+    dec.resync()
+    assert dec.garbage_bytes == 50
+    assert dec.resyncs == 1
+    assert len(dec.feed(synth_stream(1)).count) == PACKETS
+
+
+def bad_angle(pkt):
+    return pkt[:4] + b"\xff\xff\xff\xff" + pkt[8:]
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 333, 1 << 20])
+def test_split_packets_matches_decoder(chunk):
+    # The probe's numpy-free parser must find exactly the packets the decoder does.
+    chunks = packets(3, first=7)
+    chunks[40] = bad_angle(chunks[40])
+    # A payload that reads "AA 55 00 05": a header inside a packet is data.
+    chunks[60] = make_packet(0, 900, [(0xAA, 0x0055), (5, 1000)] * 5)
+    data = with_garbage(b"".join(chunks), seed=2)
+    dec = PacketDecoder()
+    parts = [dec.feed(data[i:i + chunk]) for i in range(0, len(data), chunk)]
+    expected = [(int(s), int(e)) for p in parts for s, e in zip(p.start_cdeg, p.end_cdeg)]
+    got = []
+    buf = b""
+    for i in range(0, len(data), chunk):
+        found, buf = split_packets(buf + data[i:i + chunk])
+        got += found
+    assert got == expected
+    assert len(buf) == len(dec._carry)
+
+
+def assemble(chunks, assembler=None, stamps=None):
+    assembler = assembler or ScanAssembler()
+    dec = PacketDecoder()
+    scans = []
+    for k, chunk in enumerate(chunks):
+        stamp = k * 0.1 / PACKETS if stamps is None else stamps[k]
+        scans += assembler.feed(dec.feed(chunk), stamp=stamp)
+    return assembler, scans
+
+
+def test_assembler_discards_partial_first_rotation():
+    # Start half-way through a rotation: the first complete Scan begins at 0.
+    _, scans = assemble(packets(4, first=18))
+    assert len(scans) == 3
+    assert all(len(s) == PACKETS * 10 and s.packets == PACKETS for s in scans)
+    assert [s.index for s in scans] == [1, 2, 3]
+    assert scans[0].angle.min() < 1.0
+
+
+def test_assembler_wraps_across_lost_packets():
+    # Drop every packet between 320 and 40 deg; wraps must still be found.
+    # The stream opens at 40 deg with no wrap, so that rotation is partial.
+    kept = [k for k in range(6 * PACKETS) if 4 <= k % PACKETS < 32]
+    chunks = packets(6)
+    _, scans = assemble([chunks[k] for k in kept], stamps=[k * 0.1 / PACKETS for k in kept])
+    assert len(scans) == 4
+    assert all(s.packets == 28 for s in scans)
+    assert all(abs(s.period - 0.1) < 1e-9 for s in scans)
+
+
+def test_assembler_moves_straddled_points_to_next_rotation():
+    _, scans = assemble(packets(5, offset_cdeg=500))
+    for s in scans:
+        assert len(s) == PACKETS * 10
+        assert s.angle.max() < 360.0
+    # The 0-4 deg tail of each straddling packet opens the following scan.
+    assert all(np.count_nonzero(s.angle < 5.0) == 5 for s in scans[1:])
+
+
+def test_scans_are_read_only():
+    _, scans = assemble(packets(3))
+    with pytest.raises(ValueError):
+        scans[0].distance[0] = 0
+
+
+def test_break_stream_drops_the_interrupted_rotation():
+    # 2.5 rotations, an outage, then data resumes a quarter turn later and
+    # 1.8 s afterwards. No Scan may join the two sides.
+    assembler = ScanAssembler()
+    dec = PacketDecoder()
+    scans = []
+    before = packets(3)[:90]
+    for k, chunk in enumerate(before):
+        scans += assembler.feed(dec.feed(chunk), stamp=k * 0.1 / PACKETS)
+    assert len(scans) == 1
+    assembler.break_stream()
+    resume = 90 * 0.1 / PACKETS + 1.8
+    for k, chunk in enumerate(packets(4, first=9)):
+        scans += assembler.feed(dec.feed(chunk), stamp=resume + k * 0.1 / PACKETS)
+    assert len(scans) == 4
+    assert all(len(s) == PACKETS * 10 for s in scans)
+    assert all(abs(s.period - 0.1) < 0.01 for s in scans)
+    assert abs(assembler.rotation_hz - 10.0) < 0.5
+    assert [s.index for s in scans] == [1, 2, 3, 4]
+
+
+def test_scan_ring_since():
+    ring = ScanRing(4)
+    assert ring.since(0) == ([], 0)
+    for i in range(6):
+        ring.append(i)
+    assert ring.since(0) == ([2, 3, 4, 5], 6)
+    assert ring.since(5) == ([5], 6)
+    assert ring.since(6) == ([], 6)
+    assert ring.latest() == 5 and ring[0] == 2 and list(ring) == [2, 3, 4, 5]
+
+
+class OnePacketPerRead:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.reads = 0
+
+    def read_bytes(self):
+        self.reads += 1
+        return self.chunks[self.reads - 1] if self.reads <= len(self.chunks) else b""
+
+
+def test_probe_first_scan_matches_assembler():
+    # measure_first_scan must call the first rotation complete on the same
+    # packet that makes ScanAssembler emit its first Scan, despite a partial
+    # start, lost packets around 0 deg and a corrupt angle.
+    chunks = [c for k, c in enumerate(packets(4, first=20), start=20) if k % PACKETS < 34]
+    chunks[20] = bad_angle(chunks[20])
+    assembler = ScanAssembler()
+    dec = PacketDecoder()
+    first = next(k + 1 for k, chunk in enumerate(chunks)
+                 if assembler.feed(dec.feed(chunk), stamp=k * 0.01))
+    lidar = OnePacketPerRead(chunks)
+    _, elapsed = measure_first_scan(lidar, timeout=5.0)
+    assert elapsed is not None
+    assert lidar.reads == first
@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import lidar_supervisor
+from bench_startup import synth_stream
+from lidar_core import ScanBuffer
+from lidar_supervisor import ConnectionSupervisor
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs a pseudo-terminal")
+
+ROTATION = synth_stream(1)
+
+
+class FakeDevice:
+    # A pseudo-terminal fed at 10 rotations/s, half a rotation per write, so
+    # an unplug lands mid-rotation.
+    def __init__(self):
+        self.name = None
+        self.alive = False
+
+    def plug(self):
+        import tty
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.name = os.ttyname(self.slave)
+        self.alive = True
+        threading.Thread(target=self._feed, daemon=True).start()
+
+    def _feed(self):
+        half = len(ROTATION) // 2
+        while self.alive:
+            for part in (ROTATION[:half], ROTATION[half:]):
+                if not self.alive:
+                    return
+                try:
+                    os.write(self.master, part)
+                except OSError:
+                    return
+                time.sleep(0.05)
+
+    def unplug(self):
+        self.alive = False
+        self.name = None
+        time.sleep(0.07)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def pump_for(sup, scans, seconds, seen, out):
+    end = time.time() + seconds
+    while time.time() < end:
+        for batch, stamp in sup.read_batches():
+            if batch is None:
+                scans.break_stream()
+            else:
+                scans.add_batch(batch, stamp)
+        new, seen = scans.ring.since(seen)
+        out += new
+        time.sleep(0.01)
+    return seen
+
+
+def test_unplug_mid_rotation_never_joins_rotations(monkeypatch):
+    monkeypatch.setattr(lidar_supervisor, "BACKOFF_MAX", 0.25)
+    dev = FakeDevice()
+    dev.plug()
+    sup = ConnectionSupervisor(find_port=lambda: dev.name).start()
+    scans = ScanBuffer()
+    out = []
+    try:
+        seen = pump_for(sup, scans, 1.0, 0, out)
+        before = len(out)
+        dev.unplug()
+        seen = pump_for(sup, scans, 1.8, seen, out)
+        dev.plug()
+        pump_for(sup, scans, 1.5, seen, out)
+    finally:
+        sup.close()
+        if dev.alive:
+            dev.unplug()
+
+    kinds = [e.kind for e in sup.events_since(0)[0]]
+    assert kinds[:3] == ["connected", "disconnected", "connected"]
+    assert before >= 5 and len(out) > before + 5
+    assert all(len(s) == 720 for s in out)
+    assert all(s.period < 0.2 for s in out)
+    assert 8.0 < scans.assembler.rotation_hz < 12.0
+
+
+def test_read_failure_backs_off(monkeypatch):
+    def fail(self):
+        raise lidar_supervisor.serial.SerialException("forced")
+    monkeypatch.setattr(lidar_supervisor.LidarSerial, "read_batch", fail)
+    sup = ConnectionSupervisor("loop://").start()
+    time.sleep(1.0)
+    sup.close()
+    assert sup.reconnects <= 3
+
+
+def test_unexpected_error_keeps_thread_alive():
+    calls = []
+
+    def find_port():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("enumeration broke")
+        return None
+
+    sup = ConnectionSupervisor(find_port=find_port).start()
+    time.sleep(0.6)
+    try:
+        assert sup._thread.is_alive()
+        assert len(calls) >= 2
+        events = sup.events_since(0)[0]
+        assert events[0].kind == "error" and "enumeration broke" in events[0].detail
+    finally:
+        sup.close()